@@ -0,0 +1,2 @@
+#!/bin/bash
+PYTHONPATH=src python3 -m benchmarks.run "$@"
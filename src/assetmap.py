@@ -0,0 +1,78 @@
+import hashlib
+import os
+
+# hex digits of the content hash put into fingerprinted file names
+FINGERPRINT_LENGTH = 10
+# only assets pages and stylesheets reference get fingerprinted (styles, scripts, images, fonts), everything else
+# keeps the url it's fetched by directly: pages, robots.txt, favicon.ico, CNAME and the like
+FINGERPRINTED_EXTENSIONS = {
+    ".css", ".js", ".mjs",
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".svg",
+    ".woff", ".woff2", ".ttf", ".otf", ".eot",
+}
+
+
+def should_fingerprint(rel_path):
+    return os.path.splitext(rel_path)[1].lower() in FINGERPRINTED_EXTENSIONS
+
+def fingerprinted_path(rel_path, content_hash):
+    # images/tom.png -> images/tom.<hash>.png
+    root, ext = os.path.splitext(rel_path)
+    return f"{root}.{content_hash[:FINGERPRINT_LENGTH]}{ext}"
+
+
+class AssetMap:
+    # urls = root-relative url of a static file -> root-relative url of the copy actually published
+    #        (its fingerprinted name, or the one copy kept of identical images)
+    # images = root-relative image url -> (width, height), None leaves image tags as they are
+    # digest identifies the whole mapping, so caches of rewritten html can be keyed on it
+    def __init__(self, urls=None, images=None):
+        self.urls = dict(urls or {})
+        self.images = None if images is None else dict(images)
+        digest = hashlib.sha256()
+        for url, published in sorted(self.urls.items()):
+            digest.update(f"{url}\0{published}\0".encode())
+        if self.images is not None:
+            digest.update(b"images\0")
+            for url, (width, height) in sorted(self.images.items()):
+                digest.update(f"{url}\0{width}x{height}\0".encode())
+        self.digest = digest.hexdigest()
+
+    @classmethod
+    def from_synced(cls, synced, images=False):
+        # synced = sync_dir_to_dir's record, static path relative to the output dir -> entry with an optional
+        # "output" path and, for images, "dimensions"
+        urls = {}
+        sizes = {}
+        for rel_path, entry in synced.items():
+            url = "/" + rel_path.replace(os.sep, "/")
+            if entry.get("output", rel_path) != rel_path:
+                urls[url] = "/" + entry["output"].replace(os.sep, "/")
+            if entry.get("dimensions"):
+                sizes[url] = tuple(entry["dimensions"])
+        return cls(urls, sizes if images else None)
+
+    def rewrite(self, url):
+        # only the path is looked up, a query string or fragment is kept as is
+        path, rest = _split_path(url)
+        return self.urls.get(path, path) + rest
+
+    def image_props(self, url):
+        # extra <img> attributes: intrinsic size when the image is one of ours, lazy loading for all of them
+        if self.images is None:
+            return {}
+        props = {}
+        size = self.images.get(_split_path(url)[0])
+        if size is not None:
+            props["width"], props["height"] = str(size[0]), str(size[1])
+        props["loading"] = "lazy"
+        props["decoding"] = "async"
+        return props
+
+def _split_path(url):
+    end = len(url)
+    for separator in "?#":
+        index = url.find(separator)
+        if index != -1:
+            end = min(end, index)
+    return url[:end], url[end:]
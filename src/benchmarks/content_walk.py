@@ -0,0 +1,89 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+import helperfunctions
+from benchmarks.corpus import generate_content_tree
+from helperfunctions import ensure_dir, forget_dirs, iter_pages
+
+
+def listdir_pages(content, dest):
+    # the recursive os.listdir walk content discovery used before iter_pages
+    pages = []
+    if os.path.isdir(content):
+        for item in os.listdir(content):
+            item_path = os.path.join(content, item)
+            if os.path.isdir(item_path):
+                pages.extend(listdir_pages(item_path, os.path.join(dest, item)))
+            elif item.endswith('.md'):
+                pages.append((item_path, os.path.join(dest, item.replace('.md', '.html'))))
+    return pages
+
+def exists_makedirs(pages):
+    # the per-page output directory check generate_page did before ensure_dir
+    for _, dest_path in pages:
+        if not os.path.exists(os.path.dirname(dest_path)):
+            os.makedirs(os.path.dirname(dest_path))
+
+def cached_makedirs(pages):
+    forget_dirs()
+    for _, dest_path in pages:
+        ensure_dir(os.path.dirname(dest_path))
+
+def measure(func, repeat):
+    # fastest of `repeat` runs, and how many stat calls one run makes
+    stat = os.stat
+    calls = 0
+
+    def counting_stat(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        return stat(*args, **kwargs)
+
+    times = []
+    for _ in range(repeat):
+        calls = 0
+        with mock.patch.object(helperfunctions.os, "stat", counting_stat):
+            started = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - started)
+    return min(times), calls
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time content discovery and output directory creation on a large synthetic content tree.")
+    parser.add_argument("--pages", type=int, default=100_000, help="pages in the synthetic content tree")
+    parser.add_argument("--pages-per-dir", type=int, default=50, help="pages per directory (and directories per section)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark, the fastest one is reported")
+    args = parser.parse_args(argv)
+
+    tmp = tempfile.mkdtemp()
+    try:
+        content = os.path.join(tmp, "content")
+        docs = os.path.join(tmp, "docs")
+        started = time.perf_counter()
+        generate_content_tree(content, args.pages, pages_per_dir=args.pages_per_dir)
+        print(f"generated {args.pages} pages in {time.perf_counter() - started:.1f}s")
+        pages = list(iter_pages(content, docs))
+        assert pages == listdir_pages(content, docs)
+        # the output tree already exists, as on every rebuild after the first
+        cached_makedirs(pages)
+
+        cases = [
+            ("discovery: recursive listdir", lambda: listdir_pages(content, docs)),
+            ("discovery: iter_pages (scandir)", lambda: list(iter_pages(content, docs))),
+            ("output dirs: exists + makedirs per page", lambda: exists_makedirs(pages)),
+            ("output dirs: ensure_dir", lambda: cached_makedirs(pages)),
+        ]
+        print(f"{'benchmark':<42}{'time':>12}{'stat calls':>14}")
+        for name, func in cases:
+            elapsed, calls = measure(func, args.repeat)
+            print(f"{name:<42}{elapsed * 1000:>10.1f}ms{calls:>14}")
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import os
+import random
+
+# deterministic synthetic markdown: the same (kind, seed) always produces the same text,
+# so timings from two commits are measured on identical input
+
+WORDS = (
+    "the ring of power was forged in the fires of mount doom by sauron while elves and men "
+    "of the west stood against the shadow that fell over middle earth in the second age"
+).split()
+
+# kind -> (number of blocks, weights for paragraph/heading/list/ordered list/quote/code, inline markup rate)
+PROFILES = {
+    "small": (10, (6, 2, 1, 1, 1, 1), 0.05),
+    "medium": (200, (6, 2, 1, 1, 1, 1), 0.05),
+    "huge": (5000, (6, 2, 1, 1, 1, 1), 0.05),
+    "inline_heavy": (200, (1, 0, 0, 0, 0, 0), 0.5),
+    "long_lists": (50, (0, 0, 1, 1, 0, 0), 0.05),
+    "large_code": (50, (1, 0, 0, 0, 0, 1), 0.0),
+}
+
+
+def _sentence(rng, words, markup_rate):
+    parts = []
+    for _ in range(words):
+        word = rng.choice(WORDS)
+        if rng.random() < markup_rate:
+            style = rng.randrange(5)
+            if style == 0:
+                word = f"**{word}**"
+            elif style == 1:
+                word = f"_{word}_"
+            elif style == 2:
+                word = f"`{word}`"
+            elif style == 3:
+                word = f"[{word}](/{rng.choice(WORDS)}/{rng.randrange(1000)})"
+            else:
+                word = f"![{word}](/images/{rng.choice(WORDS)}{rng.randrange(100)}.png)"
+        parts.append(word)
+    return " ".join(parts)
+
+
+def _block(rng, kind, markup_rate, list_length):
+    if kind == 0:
+        return "\n".join(_sentence(rng, rng.randint(8, 20), markup_rate) + "." for _ in range(rng.randint(1, 5)))
+    if kind == 1:
+        return "#" * rng.randint(1, 6) + " " + _sentence(rng, rng.randint(2, 6), markup_rate)
+    if kind == 2:
+        return "\n".join("- " + _sentence(rng, rng.randint(3, 10), markup_rate) for _ in range(list_length))
+    if kind == 3:
+        return "\n".join(f"{i + 1}. " + _sentence(rng, rng.randint(3, 10), markup_rate) for i in range(list_length))
+    if kind == 4:
+        return "\n".join("> " + _sentence(rng, rng.randint(5, 15), markup_rate) for _ in range(rng.randint(1, 4)))
+    lines = [f"    {rng.choice(WORDS)}_{i} = {rng.choice(WORDS)}({rng.randrange(100)})" for i in range(list_length)]
+    return "```\n" + "\n".join(lines) + "\n```"
+
+
+def generate_document(kind="medium", seed=0):
+    blocks_count, weights, markup_rate = PROFILES[kind]
+    rng = random.Random(f"{kind}-{seed}")
+    list_length = 200 if kind in ("long_lists", "large_code") else 5
+    blocks = [f"# {_sentence(rng, 4, 0)}"]
+    for _ in range(blocks_count):
+        block_kind = rng.choices(range(6), weights=weights)[0]
+        blocks.append(_block(rng, block_kind, markup_rate, list_length))
+    return "\n\n".join(blocks) + "\n"
+
+
+def generate_content_tree(root, pages, kind="small", seed=0, pages_per_dir=50):
+    # writes `pages` markdown files under root, spread over nested directories like a blog archive
+    for i in range(pages):
+        directory = os.path.join(root, f"section{i // (pages_per_dir * pages_per_dir)}", f"dir{(i // pages_per_dir) % pages_per_dir}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"page{i}.md"), 'w') as f:
+            f.write(generate_document(kind, seed + i))
@@ -0,0 +1,66 @@
+import gc
+import sys
+import tracemalloc
+
+from nodes.leafnode import LeafNode
+from nodes.parentnode import ParentNode
+from nodes.textnode import TextNode, TextType
+
+# subclasses without __slots__ get a per-instance __dict__ again,
+# which is exactly what the node classes looked like before they were slotted
+
+
+class DictTextNode(TextNode):
+    pass
+
+
+class DictLeafNode(LeafNode):
+    pass
+
+
+class DictParentNode(ParentNode):
+    pass
+
+
+def _text_node(cls, i):
+    return cls(f"text {i}", TextType.BOLD, None)
+
+
+def _leaf_node(cls, i):
+    return cls(f"text {i}", "b", None)
+
+
+def _parent_node(cls, i):
+    return cls("p", [], None)
+
+
+CASES = [
+    ("TextNode", DictTextNode, TextNode, _text_node),
+    ("LeafNode", DictLeafNode, LeafNode, _leaf_node),
+    ("ParentNode", DictParentNode, ParentNode, _parent_node),
+]
+
+
+def bytes_per_node(cls, factory, count):
+    # the payload (strings, child lists) is built up front so only the node objects are measured
+    payloads = [factory(lambda *args: args, i) for i in range(count)]
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = [cls(*payload) for payload in payloads]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # the list holding the nodes is the same size either way, so leave it out
+    return (after - before - sys.getsizeof(nodes)) / count
+
+
+def main(count=100_000):
+    print(f"{'node':<12}{'before (__dict__)':>20}{'after (__slots__)':>20}{'saved':>10}")
+    for name, dict_cls, slot_cls, factory in CASES:
+        before = bytes_per_node(dict_cls, factory, count)
+        after = bytes_per_node(slot_cls, factory, count)
+        print(f"{name:<12}{before:>17.1f} B{after:>17.1f} B{1 - after / before:>9.0%}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,101 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+from benchmarks.corpus import PROFILES, generate_content_tree, generate_document
+from helperfunctions import generate_page_recursive
+from markdownparser import markdown_to_blocks, markdown_to_html_node, text_to_textnodes
+
+TEMPLATE = "<!doctype html><html><head><title>{{ Title }}</title></head><body>{{ Content }}</body></html>"
+
+
+def measure(func, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return {"min": min(times), "median": statistics.median(times), "repeat": repeat}
+
+
+def parser_benchmarks(kinds, repeat):
+    results = {}
+    for kind in kinds:
+        markdown = generate_document(kind)
+        paragraphs = markdown_to_blocks(markdown)
+        node = markdown_to_html_node(markdown)
+        results[f"markdown_to_blocks[{kind}]"] = measure(lambda: markdown_to_blocks(markdown), repeat)
+        results[f"text_to_textnodes[{kind}]"] = measure(lambda: [text_to_textnodes(block) for block in paragraphs], repeat)
+        results[f"markdown_to_html_node[{kind}]"] = measure(lambda: markdown_to_html_node(markdown), repeat)
+        results[f"to_html[{kind}]"] = measure(node.to_html, repeat)
+    return results
+
+
+def build_benchmark(pages, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        content = os.path.join(tmp, "content")
+        template = os.path.join(tmp, "template.html")
+        generate_content_tree(content, pages)
+        with open(template, 'w') as f:
+            f.write(TEMPLATE)
+        # serial full build without a manifest, so every repeat does the same work
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            result = measure(lambda: generate_page_recursive(content, template, os.path.join(tmp, "docs")), repeat)
+    return {f"generate_page_recursive[{pages} pages]": result}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old_path, new_results):
+    with open(old_path) as f:
+        old_results = json.load(f)["results"]
+    print(f"{'benchmark':<45}{'before':>12}{'after':>12}{'change':>10}")
+    for name, result in new_results.items():
+        if name not in old_results:
+            continue
+        before, after = old_results[name]["min"], result["min"]
+        print(f"{name:<45}{before * 1000:>10.2f}ms{after * 1000:>10.2f}ms{(after - before) / before:>+10.1%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the markdown parser, renderer and full builds on a synthetic corpus.")
+    parser.add_argument("--kinds", nargs="+", default=list(PROFILES), choices=list(PROFILES), help="document profiles to time")
+    parser.add_argument("--pages", type=int, default=200, help="pages in the synthetic content tree (0 skips the build benchmark)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark, the fastest one is reported")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", metavar="JSON", help="compare against results saved earlier with --output")
+    args = parser.parse_args(argv)
+
+    results = parser_benchmarks(args.kinds, args.repeat)
+    if args.pages:
+        results.update(build_benchmark(args.pages, args.repeat))
+
+    for name, result in results.items():
+        print(f"{name:<45}{result['min'] * 1000:>10.2f}ms (median {result['median'] * 1000:.2f}ms)")
+    if args.output:
+        report = {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "results": results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=1)
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == "__main__":
+    main()
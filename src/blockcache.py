@@ -0,0 +1,117 @@
+import hashlib
+import os
+import sqlite3
+import time
+
+
+class BlockCache:
+    # on-disk cache of rendered html per markdown block, shared by every page and every build
+    # entries are keyed by a hash of (parser version, base_path, block), and the least recently used ones are
+    # evicted once the stored html goes over max_bytes
+    def __init__(self, path, max_bytes=64 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._pending = {}  # key -> html, written on flush
+        self.pending_size = 0  # characters of html waiting in _pending
+        self._touched = set()  # keys whose last_used needs bumping on flush
+        self._connection = None
+        self._pid = None
+
+    @staticmethod
+    def key(parser_version, base_path, block_type, lines):
+        digest = hashlib.sha256(f"{parser_version}\0{base_path}\0{block_type.name}\0".encode())
+        for line in lines:
+            digest.update(line.encode())
+            digest.update(b"\n")
+        return digest.hexdigest()
+
+    def _connect(self):
+        # connections must not cross a fork, worker processes open their own
+        if self._connection is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, timeout=60)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS blocks (key TEXT PRIMARY KEY, html TEXT NOT NULL, size INTEGER NOT NULL, last_used INTEGER NOT NULL)"
+            )
+            self._pid = os.getpid()
+        return self._connection
+
+    # count = False leaves hits and misses alone, for callers that decide themselves whether a block was served
+    # from the cache (see count)
+    def get(self, key, count=True):
+        html = self._pending.get(key)
+        if html is None:
+            row = self._connect().execute("SELECT html FROM blocks WHERE key = ?", (key,)).fetchone()
+            html = row[0] if row else None
+        if html is None:
+            if count:
+                self.misses += 1
+            return None
+        if count:
+            self.hits += 1
+        self._touched.add(key)
+        return html
+
+    def count(self, hit):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def put(self, key, html):
+        self._pending[key] = html
+        self.pending_size += len(html)
+
+    def flush(self):
+        if not self._pending and not self._touched:
+            return
+        now = time.time_ns()
+        connection = self._connect()
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO blocks (key, html, size, last_used) VALUES (?, ?, ?, ?)",
+                [(key, html, len(html), now) for key, html in self._pending.items()],
+            )
+            connection.executemany("UPDATE blocks SET last_used = ? WHERE key = ?", [(now, key) for key in self._touched])
+        self._pending.clear()
+        self._touched.clear()
+        self.pending_size = 0
+
+    def evict(self):
+        # drop least recently used entries until the stored html fits in max_bytes, returns how many went
+        self.flush()
+        connection = self._connect()
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM blocks").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        doomed = []
+        for key, size in connection.execute("SELECT key, size FROM blocks ORDER BY last_used ASC"):
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        with connection:
+            connection.executemany("DELETE FROM blocks WHERE key = ?", doomed)
+        return len(doomed)
+
+    def close(self):
+        self.flush()
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+
+
+# one cache per database path per process, so worker processes reuse their connection across pages
+_open_caches = {}
+
+
+def get_block_cache(path, max_bytes=64 * 1024 * 1024):
+    cache = _open_caches.get(path)
+    if cache is None:
+        cache = _open_caches[path] = BlockCache(path, max_bytes)
+    return cache
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 2
+
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# path -> ((mtime_ns, size), hash), kept for the life of the process so unchanged files are hashed once
+_hash_cache = {}
+
+
+def hash_file_cached(path):
+    # None for files that don't exist, so a dependency that appears later still counts as a change
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _hash_cache.get(path)
+    if cached is None or cached[0] != signature:
+        cached = _hash_cache[path] = (signature, hash_file(path))
+    return cached[1]
+
+
+class BuildManifest:
+    def __init__(self, pages=None, assets=None, compressed=None):
+        # source path -> {"dest_path", "base_path", "asset_map": assetmap.AssetMap digest or None, "deps": {input path -> content hash}}
+        # deps holds the page's markdown source, its template and partials, and the static files it references
+        self.pages = pages if pages is not None else {}
+        # static file path relative to the output dir -> {"size", "mtime_ns"[, "hash"]}
+        self.assets = assets if assets is not None else {}
+        # output path relative to the output dir -> {"size", "mtime_ns", "hash"} of files with precompressed siblings
+        self.compressed = compressed if compressed is not None else {}
+
+    @classmethod
+    def load(cls, path):
+        # a missing or unreadable manifest just means everything gets rebuilt
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            return cls()
+        return cls(pages=data.get("pages", {}), assets=data.get("assets", {}), compressed=data.get("compressed", {}))
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"version": MANIFEST_VERSION, "pages": self.pages, "assets": self.assets, "compressed": self.compressed}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def rebuild_reasons(self, source_path, entry):
+        # return = list of human readable reasons the page has to be rebuilt, empty when it is up to date
+        old_entry = self.pages.get(source_path)
+        if old_entry is None:
+            return ["new page"]
+        reasons = []
+        if not os.path.exists(entry["dest_path"]):
+            reasons.append("output missing")
+        for key in entry:
+            if key != "deps" and old_entry.get(key) != entry[key]:
+                reasons.append(f"{key} changed")
+        old_deps = old_entry.get("deps", {})
+        for path, digest in entry.get("deps", {}).items():
+            if path not in old_deps:
+                reasons.append(f"new dependency {path}")
+            elif old_deps[path] != digest:
+                reasons.append(f"{path} changed")
+        for path in old_deps:
+            if path not in entry.get("deps", {}):
+                reasons.append(f"no longer depends on {path}")
+        return reasons
+
+    def record(self, source_path, entry):
+        self.pages[source_path] = entry
+
+    def pop_missing(self, seen_sources):
+        # forget every page whose source is gone and hand back the entries so their outputs can be removed
+        missing = [source for source in self.pages if source not in seen_sources]
+        return [self.pages.pop(source) for source in missing]
@@ -0,0 +1,89 @@
+import json
+import time
+
+STAGES = ("read", "block_split", "block_cache", "inline_parse", "html_tree", "render", "template_fill", "write")
+
+
+class PageStats:
+    def __init__(self, path):
+        self.path = path
+        self.times = dict.fromkeys(STAGES, 0.0)
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.nodes = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def add(self, stage, seconds):
+        self.times[stage] += seconds
+
+    @property
+    def total(self):
+        return sum(self.times.values())
+
+    def to_dict(self):
+        return {
+            "path": self.path,
+            "total": self.total,
+            "times": self.times,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "nodes": self.nodes,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+        }
+
+
+class BuildStats:
+    def __init__(self):
+        self.pages = []
+        self.started = time.perf_counter()
+        self.wall_time = None
+
+    def add_page(self, page_stats):
+        self.pages.append(page_stats)
+
+    def finish(self):
+        self.wall_time = time.perf_counter() - self.started
+
+    def stage_totals(self):
+        totals = dict.fromkeys(STAGES, 0.0)
+        for page in self.pages:
+            for stage, seconds in page.times.items():
+                totals[stage] += seconds
+        return totals
+
+    def slowest(self, count=10):
+        return sorted(self.pages, key=lambda page: page.total, reverse=True)[:count]
+
+    def to_dict(self, slowest=10):
+        return {
+            "pages": len(self.pages),
+            "wall_time": self.wall_time,
+            "stages": self.stage_totals(),
+            "bytes_read": sum(page.bytes_read for page in self.pages),
+            "bytes_written": sum(page.bytes_written for page in self.pages),
+            "nodes": sum(page.nodes for page in self.pages),
+            "cache_hits": sum(page.cache_hits for page in self.pages),
+            "cache_misses": sum(page.cache_misses for page in self.pages),
+            "slowest": [page.to_dict() for page in self.slowest(slowest)],
+        }
+
+    def write_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=1)
+
+    def print_summary(self, slowest=10):
+        report = self.to_dict(slowest)
+        total = sum(report["stages"].values()) or 1.0
+        print(f"Build stats: {report['pages']} pages, {report['nodes']} nodes, "
+              f"{report['bytes_read']} bytes read, {report['bytes_written']} bytes written, "
+              f"{report['wall_time'] or 0:.3f}s wall time")
+        if report["cache_hits"] or report["cache_misses"]:
+            print(f"Block cache: {report['cache_hits']} hits, {report['cache_misses']} misses")
+        for stage, seconds in report["stages"].items():
+            print(f"  {stage:<18}{seconds * 1000:>10.2f}ms {seconds / total:>6.1%}")
+        if self.pages:
+            print("Slowest pages:")
+            for page in self.slowest(slowest):
+                print(f"  {page.total * 1000:>10.2f}ms  {page.path}")
@@ -4,4 +4,14 @@ DELIMITERS = {
     "**": TextType.BOLD,
     "_": TextType.ITALIC,
     "`": TextType.CODE,
-}
\ No newline at end of file
+}
+
+MANIFEST_PATH = "./.build-cache/manifest.json"
+BLOCK_CACHE_PATH = "./.build-cache/blocks.sqlite3"
+SEARCH_INDEX_PATH = "./.build-cache/search.json"
+
+# markdown sources of this many bytes or more are parsed and written block by block instead of in one piece
+STREAM_THRESHOLD = 8 * 1024 * 1024
+
+# below this many bytes compression saves less than a packet and the server may as well send the original
+PRECOMPRESS_MIN_SIZE = 1024
@@ -1,22 +1,101 @@
+import locale
+import mmap
 import os
+import re
 import shutil
+import time
 
-from markdownparser import markdown_to_html_node
+from assetmap import fingerprinted_path, should_fingerprint
+from buildmanifest import hash_bytes, hash_file, hash_file_cached
+from buildstats import PageStats
+from imageinfo import image_size, is_image_path
+from markdownparser import StreamedMarkdown, extract_markdown_images, extract_markdown_links, markdown_to_html_node
+from outputwriter import OutputWriter
+from templateengine import load_template, resolve_layout
 
 
-def copy_from_dir_to_dir(from_dir, to_dir):
-    if os.path.exists(to_dir):
-        shutil.rmtree(to_dir)
-    os.mkdir(to_dir)
+def _file_unchanged(from_stat, to_path):
+    try:
+        to_stat = os.stat(to_path)
+    except FileNotFoundError:
+        return False
+    return to_stat.st_size == from_stat.st_size and to_stat.st_mtime_ns == from_stat.st_mtime_ns
+
+# fingerprint = copy static files to name.<hash>.ext instead, the entry's "output" records the name used
+# images = record every image's [width, height] as "dimensions" (None if unreadable), and publish byte-identical images only once: the
+#          duplicates' entries point "output" at the kept copy and carry "duplicate_of"
+# publish = False only works out the record (hashes, output names, image sizes) without touching to_dir
+def sync_dir_to_dir(from_dir, to_dir, previous=None, use_hash=False, fingerprint=False, images=False, publish=True):
     if not os.path.exists(from_dir):
         raise FileNotFoundError(f"The source directory '{from_dir}' does not exist.")
-    files_to_copy = os.listdir(from_dir)
-    for file_name in files_to_copy:
-        full_file_name = os.path.join(from_dir, file_name)
-        if os.path.isfile(full_file_name):
-            shutil.copy(full_file_name, to_dir)
-        elif os.path.isdir(full_file_name):
-            copy_from_dir_to_dir(full_file_name, os.path.join(to_dir, file_name))
+    forget_dirs()
+    previous = previous or {}
+    synced = {}
+    from_stats = {}
+    for root, _, file_names in os.walk(from_dir):
+        for file_name in file_names:
+            from_path = os.path.join(root, file_name)
+            rel_path = os.path.relpath(from_path, from_dir)
+            from_stat = os.stat(from_path)
+            entry = {"size": from_stat.st_size, "mtime_ns": from_stat.st_mtime_ns}
+            old_entry = previous.get(rel_path, {})
+            is_image = images and is_image_path(rel_path)
+            if use_hash or fingerprint or is_image:
+                if "hash" in old_entry and old_entry["size"] == entry["size"] and old_entry["mtime_ns"] == entry["mtime_ns"]:
+                    entry["hash"] = old_entry["hash"]
+                else:
+                    entry["hash"] = hash_file(from_path)
+            if is_image:
+                # header sizes are cached per content hash, an image is only opened again once its bytes change
+                if old_entry.get("hash") == entry["hash"] and "dimensions" in old_entry:
+                    entry["dimensions"] = old_entry["dimensions"]
+                else:
+                    size = image_size(from_path)
+                    entry["dimensions"] = None if size is None else list(size)
+            if fingerprint and should_fingerprint(rel_path):
+                entry["output"] = fingerprinted_path(rel_path, entry["hash"])
+            synced[rel_path] = entry
+            from_stats[rel_path] = (from_path, from_stat)
+
+    duplicates = 0
+    if images:
+        kept = {}  # content hash -> first image (in path order) with those bytes
+        for rel_path in sorted(synced):
+            entry = synced[rel_path]
+            if not is_image_path(rel_path):
+                continue
+            first = kept.setdefault(entry["hash"], rel_path)
+            if first != rel_path:
+                entry["output"] = synced[first].get("output", first)
+                entry["duplicate_of"] = first
+                duplicates += 1
+    if not publish:
+        return synced
+
+    copied = 0
+    for rel_path, entry in synced.items():
+        if "duplicate_of" in entry:
+            continue
+        from_path, from_stat = from_stats[rel_path]
+        to_path = os.path.join(to_dir, entry.get("output", rel_path))
+        if _file_unchanged(from_stat, to_path):
+            continue
+        # same bytes under a different mtime (fresh checkout, touch) only needs its timestamps fixed
+        if "hash" in entry and os.path.isfile(to_path) and os.path.getsize(to_path) == from_stat.st_size and hash_file(to_path) == entry["hash"]:
+            shutil.copystat(from_path, to_path)
+            continue
+        ensure_dir(os.path.dirname(to_path))
+        shutil.copy2(from_path, to_path)
+        copied += 1
+
+    # only files we copied on an earlier run count as orphans, generated pages are never touched
+    outputs = {entry.get("output", rel_path) for rel_path, entry in synced.items()}
+    removed = {entry.get("output", rel_path) for rel_path, entry in previous.items()} - outputs
+    for output in removed:
+        remove_output(os.path.join(to_dir, output), to_dir)
+    deduplicated = f", {duplicates} duplicate images skipped" if duplicates else ""
+    print(f"Static files: {copied} copied, {len(synced) - copied - duplicates} unchanged, {len(removed)} removed{deduplicated}")
+    return synced
 
 def extract_title(markdown):
     lines = markdown.splitlines()
@@ -25,39 +104,400 @@ def extract_title(markdown):
             return line[2:].strip()
     raise ValueError("No title found in the markdown content.")
 
-def generate_page(from_path, template_path, dest_path, base_path):
-    if not os.path.exists(from_path):
-        raise FileNotFoundError(f"The source file '{from_path}' does not exist.")
-    if not os.path.exists(template_path):
-        raise FileNotFoundError(f"The template file '{template_path}' does not exist.")
-    if not os.path.exists(os.path.dirname(dest_path)):
-        os.makedirs(os.path.dirname(dest_path))
+def split_front_matter(markdown):
+    # optional header block delimited by '---' lines, holding 'key: value' pairs such as 'layout: post'
+    if not markdown.startswith("---\n"):
+        return {}, markdown
+    end = markdown.find("\n---\n", 3)
+    if end == -1:
+        return {}, markdown
+    meta = {}
+    for line in markdown[4:end].splitlines():
+        key, sep, value = line.partition(":")
+        if sep:
+            meta[key.strip()] = value.strip()
+    return meta, markdown[end + 5:]
 
-    print(f"Generating page from {from_path} to {dest_path} using {template_path} ")
-    with open(from_path, 'r') as f:
-        content = f.read()
+# parses an already read markdown source
+# text_sink = see markdown_to_html_node
+# return = (compiled template, placeholder values) ready for template.render / template.render_to
+def render_page(source, from_path, template_path, dest_path, base_path, block_cache=None, text_sink=None, assets=None):
+    meta, content = split_front_matter(source)
+    template = load_template(resolve_layout(template_path, meta.get("layout")), base_path, assets)
+    print(f"Generating page from {from_path} to {dest_path} using {template.path} ")
+    html_node = markdown_to_html_node(content, base_path, block_cache=block_cache, text_sink=text_sink, assets=assets)
+    title = extract_title(content)
+    return template, {"Title": title, "Content": html_node}
+
+# collect_stats = when True the page is built stage by stage into buffers so every stage can be timed
+# block_cache = optional blockcache.BlockCache used to skip parsing blocks rendered before
+# previous_output_hash = digest recorded the last time dest_path was written, if known
+# stream_threshold = sources of at least this many bytes are mapped and rendered block by block (see
+#                    _generate_page_streamed), None always reads the whole source
+# search = also collect the page's search postings
+# assets = optional assetmap.AssetMap, static file references in the page and its template use the fingerprinted urls
+# return = {"output_hash": sha256 of the page, "written": False if dest_path already held these exact bytes,
+#           "stats": buildstats.PageStats or None, "search": {"title", "terms": searchindex.page_postings} or None}
+def generate_page(from_path, template_path, dest_path, base_path, collect_stats=False, block_cache=None, previous_output_hash=None, stream_threshold=None, search=False, assets=None):
+    text_sink = postings_sink(search)
+    if should_stream(from_path, stream_threshold):
+        result = _generate_page_streamed(from_path, template_path, dest_path, base_path, collect_stats, block_cache, previous_output_hash, text_sink, assets)
+    elif collect_stats:
+        result = _generate_page_with_stats(from_path, template_path, dest_path, base_path, block_cache, previous_output_hash, text_sink, assets)
+    else:
+        result = _generate_page(from_path, template_path, dest_path, base_path, block_cache, previous_output_hash, text_sink, assets)
+    result["search"] = search_entry(result.pop("title"), text_sink)
+    return result
+
+def postings_sink(search):
+    if not search:
+        return None
+    from searchindex import PostingsSink
+    return PostingsSink()
+
+def search_entry(title, text_sink):
+    return None if text_sink is None else {"title": title, "terms": text_sink.terms}
+
+def _generate_page(from_path, template_path, dest_path, base_path, block_cache, previous_output_hash, text_sink, assets):
+    source = read_source(from_path)
+    ensure_dir(os.path.dirname(dest_path))
+    template, values = render_page(source, from_path, template_path, dest_path, base_path, block_cache=block_cache, text_sink=text_sink, assets=assets)
+
+    with OutputWriter(dest_path, previous_output_hash) as writer:
+        template.render_to(writer, values)
+    return {"output_hash": writer.digest, "written": writer.written, "stats": None, "title": values["Title"]}
 
-    with open(template_path, 'r') as f:
-        template = f.read()
+def _generate_page_with_stats(from_path, template_path, dest_path, base_path, block_cache, previous_output_hash, text_sink, assets):
+    clock = time.perf_counter
+    stats = PageStats(from_path)
+    ensure_dir(os.path.dirname(dest_path))
 
-    html_node = markdown_to_html_node(content)
-    html_rendered = html_node.to_html()
+    started = clock()
+    with open(from_path, 'r') as f:
+        raw = f.read()
+    stats.add("read", clock() - started)
+    stats.bytes_read = os.path.getsize(from_path)
+
+    meta, content = split_front_matter(raw)
+    template = load_template(resolve_layout(template_path, meta.get("layout")), base_path, assets)
+    print(f"Generating page from {from_path} to {dest_path} using {template.path} ")
+    html_node = markdown_to_html_node(content, base_path, stats, block_cache, text_sink, assets)
     title = extract_title(content)
-    page_content = template.replace("{{ Title }}", title).replace("{{ Content }}", html_rendered)
-
-    for quote in ('"', "'"):
-        page_content = page_content.replace(f'href={quote}/', f'href={quote}{base_path}')
-        page_content = page_content.replace(f'src={quote}/', f'src={quote}{base_path}')
-
-    with open(dest_path, 'w') as f:
-        f.write(page_content)
-
-def generate_page_recursive(dir_path_content, template_path, dest_dir_path, base_path="/"):
-    if os.path.isdir(dir_path_content):
-        for item in os.listdir(dir_path_content):
-            item_path = os.path.join(dir_path_content, item)
-            if os.path.isdir(item_path):
-                generate_page_recursive(item_path, template_path, os.path.join(dest_dir_path, item), base_path)
-            elif item.endswith('.md'):
-                dest_path = os.path.join(dest_dir_path, item.replace('.md', '.html'))
-                generate_page(item_path, template_path, dest_path, base_path)
\ No newline at end of file
+
+    started = clock()
+    chunks = []
+    html_node.render_to(chunks)
+    html_rendered = "".join(chunks)
+    stats.add("render", clock() - started)
+
+    started = clock()
+    page_chunks = []
+    template.render_to(page_chunks, {"Title": title, "Content": html_rendered})
+    stats.add("template_fill", clock() - started)
+
+    started = clock()
+    with OutputWriter(dest_path, previous_output_hash) as writer:
+        writer.writelines(page_chunks)
+    stats.add("write", clock() - started)
+    stats.bytes_written = writer.size if writer.written else 0
+    return {"output_hash": writer.digest, "written": writer.written, "stats": stats, "title": title}
+
+def should_stream(from_path, stream_threshold):
+    if stream_threshold is None:
+        return False
+    try:
+        size = os.stat(from_path).st_size
+    except FileNotFoundError:
+        return False
+    # empty files can't be mapped
+    return size >= max(stream_threshold, 1)
+
+TITLE_LINE_PATTERN = re.compile(rb"^# ", re.MULTILINE)
+
+# for very large sources: the file is mapped instead of read, front matter and title are found by scanning the
+# mapped bytes, and the body is decoded a line at a time while its blocks are parsed and written, so memory stays
+# around one block instead of several copies of the document. Output is identical to the buffered path
+def _generate_page_streamed(from_path, template_path, dest_path, base_path, collect_stats, block_cache, previous_output_hash, text_sink, assets):
+    started = time.perf_counter()
+    ensure_dir(os.path.dirname(dest_path))
+
+    encoding = locale.getpreferredencoding(False)
+    with open(from_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as source:
+        meta, body_start = _mapped_front_matter(source, encoding)
+        template = load_template(resolve_layout(template_path, meta.get("layout")), base_path, assets)
+        print(f"Generating page from {from_path} to {dest_path} using {template.path} (streamed)")
+        title = _mapped_title(source, body_start, encoding)
+        content = StreamedMarkdown(_mapped_lines(source, body_start, encoding), base_path, block_cache, text_sink, assets)
+        with OutputWriter(dest_path, previous_output_hash) as writer:
+            template.render_to(writer, {"Title": title, "Content": content})
+        bytes_read = len(source)
+
+    stats = None
+    if collect_stats:
+        # blocks are parsed while they're written, so the whole page is timed as one render stage
+        stats = PageStats(from_path)
+        stats.add("render", time.perf_counter() - started)
+        stats.bytes_read = bytes_read
+        stats.bytes_written = writer.size if writer.written else 0
+    return {"output_hash": writer.digest, "written": writer.written, "stats": stats, "title": title}
+
+def _mapped_front_matter(source, encoding):
+    # return = (front matter dict, offset where the markdown body starts), same rules as split_front_matter
+    if source[:4] != b"---\n":
+        return {}, 0
+    end = source.find(b"\n---\n", 3)
+    if end == -1:
+        return {}, 0
+    meta, _ = split_front_matter(source[:end + 5].decode(encoding))
+    return meta, end + 5
+
+def _mapped_title(source, start, encoding):
+    match = TITLE_LINE_PATTERN.search(source, start)
+    if match is None:
+        raise ValueError("No title found in the markdown content.")
+    end = source.find(b"\n", match.start())
+    return source[match.start() + 2:len(source) if end == -1 else end].decode(encoding).strip()
+
+def _mapped_lines(source, start, encoding):
+    while True:
+        end = source.find(b"\n", start)
+        if end == -1:
+            yield source[start:].decode(encoding)
+            return
+        yield source[start:end].decode(encoding)
+        start = end + 1
+
+# yields (source path, output path) for every .md file under dir_path_content, in the same order a recursive listdir
+# would. os.scandir hands back each entry's type from the directory listing itself, so telling files from directories
+# costs no stat call per entry, and the walk keeps one open iterator per level instead of one call frame per directory
+def iter_pages(dir_path_content, dest_dir_path):
+    if not os.path.isdir(dir_path_content):
+        return
+    stack = [(os.scandir(dir_path_content), dest_dir_path)]
+    try:
+        while stack:
+            entries, dest_dir = stack[-1]
+            entry = next(entries, None)
+            if entry is None:
+                entries.close()
+                stack.pop()
+            elif entry.is_dir():
+                stack.append((os.scandir(entry.path), os.path.join(dest_dir, entry.name)))
+            elif entry.name.endswith('.md'):
+                yield entry.path, os.path.join(dest_dir, entry.name.replace('.md', '.html'))
+    finally:
+        for entries, _ in stack:
+            entries.close()
+
+def collect_pages(dir_path_content, dest_dir_path):
+    return list(iter_pages(dir_path_content, dest_dir_path))
+
+# output directories known to exist, so a build writing thousands of pages into the same few directories checks and
+# creates each of them once instead of once per page. Forgotten at the start of every build (the output dir may have
+# been cleaned in between) and whenever remove_output deletes a directory
+_existing_dirs = set()
+
+def ensure_dir(path):
+    if path in _existing_dirs:
+        return
+    os.makedirs(path, exist_ok=True)
+    _existing_dirs.add(path)
+
+def forget_dirs():
+    _existing_dirs.clear()
+
+def read_source(from_path):
+    try:
+        with open(from_path, 'r') as f:
+            return f.read()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"The source file '{from_path}' does not exist.") from None
+
+def remove_output(dest_path, dest_root):
+    if os.path.exists(dest_path):
+        os.remove(dest_path)
+    # drop directories that only existed for the removed page, but never the output root itself
+    directory = os.path.dirname(dest_path)
+    dest_root = os.path.abspath(dest_root)
+    while os.path.abspath(directory).startswith(dest_root + os.sep) and os.path.isdir(directory) and not os.listdir(directory):
+        os.rmdir(directory)
+        _existing_dirs.discard(directory)
+        directory = os.path.dirname(directory)
+
+def _generate_page_job(job):
+    job = dict(job)
+    block_cache_path = job.pop("block_cache_path", None)
+    if block_cache_path is None:
+        return dict(generate_page(**job), cache_hits=0, cache_misses=0)
+    # every process opens the cache once and writes what it learned after each page
+    from blockcache import get_block_cache
+    block_cache = get_block_cache(block_cache_path)
+    hits, misses = block_cache.hits, block_cache.misses
+    result = generate_page(**job, block_cache=block_cache)
+    block_cache.flush()
+    return dict(result, cache_hits=block_cache.hits - hits, cache_misses=block_cache.misses - misses)
+
+def generate_pages(jobs, workers=1):
+    # jobs = list of dicts holding generate_page's keyword arguments, plus an optional block_cache_path
+    # return = list of generate_page results, with the job's block cache hits and misses added, in job order
+    if workers <= 1 or len(jobs) <= 1:
+        return [_generate_page_job(job) for job in jobs]
+    workers = min(workers, len(jobs))
+    # a few chunks per worker keeps IPC overhead low while still balancing uneven page sizes
+    chunksize = max(1, len(jobs) // (workers * 4))
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_generate_page_job, jobs, chunksize=chunksize))
+
+def _record_search(search_index, jobs, results, pages, dest_dir_path):
+    if search_index is None:
+        return
+    for job, result in zip(jobs, results):
+        search = result["search"]
+        source_hash = _source_info(job["from_path"])[0]
+        search_index.record(job["from_path"], os.path.relpath(job["dest_path"], dest_dir_path), search["title"], search["terms"], source_hash)
+    search_index.pop_missing({from_path for from_path, _ in pages})
+
+def _report_results(stats, results, block_cache_path):
+    if stats is not None:
+        for result in results:
+            # the job's counts also cover streamed pages, whose blocks aren't timed one by one
+            result["stats"].cache_hits, result["stats"].cache_misses = result["cache_hits"], result["cache_misses"]
+            stats.add_page(result["stats"])
+        # the stats summary reports the block cache itself
+        return
+    if block_cache_path is not None and results:
+        hits = sum(result["cache_hits"] for result in results)
+        misses = sum(result["cache_misses"] for result in results)
+        print(f"Block cache: {hits} hits, {misses} misses")
+
+# path -> ((mtime_ns, size), source hash, layout, referenced image urls, link urls), kept for the life of the process so
+# repeated builds (watch mode) only re-read sources whose stat changed
+_source_info_cache = {}
+
+def _source_info(from_path):
+    stat = os.stat(from_path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _source_info_cache.get(from_path)
+    if cached is not None and cached[0] == signature:
+        return cached[1:]
+    with open(from_path, 'rb') as f:
+        source = f.read()
+    meta, content = split_front_matter(source.decode())
+    images = sorted({url for _, url in extract_markdown_images(content)})
+    links = sorted({url for _, url in extract_markdown_links(content)})
+    _source_info_cache[from_path] = (signature, hash_bytes(source), meta.get("layout"), images, links)
+    return _source_info_cache[from_path][1:]
+
+def static_path_for_url(url, static_dir):
+    # root-relative urls ("/images/tom.png") map onto files under the static directory
+    if static_dir is None or not url.startswith("/") or url.startswith("//"):
+        return None
+    return os.path.join(static_dir, url[1:].split("?")[0].split("#")[0])
+
+def page_dependencies(from_path, template_path, base_path, static_dir=None, assets=None):
+    # return = {input path -> content hash} for everything the page's output is built from
+    source_hash, layout, images, links = _source_info(from_path)
+    deps = {from_path: source_hash}
+    template = load_template(resolve_layout(template_path, layout), base_path, assets)
+    for path in template.dependencies:
+        deps[path] = hash_file_cached(path)
+    # fingerprinted names are derived from content, so the template's static references and the links the asset map
+    # rewrites become inputs too
+    urls = images
+    if assets is not None:
+        urls = sorted(set(images) | set(template.urls) | {url for url in links if assets.rewrite(url) != url})
+    for url in urls:
+        asset_path = static_path_for_url(url, static_dir)
+        if asset_path is not None:
+            deps[asset_path] = hash_file_cached(asset_path)
+    return deps
+
+def _page_job(from_path, template_path, dest_path, base_path, *, collect_stats=False, block_cache_path=None, previous_output_hash=None, stream_threshold=None, search=False, assets=None):
+    return {
+        "from_path": from_path,
+        "template_path": template_path,
+        "dest_path": dest_path,
+        "base_path": base_path,
+        "collect_stats": collect_stats,
+        "previous_output_hash": previous_output_hash,
+        "block_cache_path": block_cache_path,
+        "stream_threshold": stream_threshold,
+        "search": search,
+        "assets": assets,
+    }
+
+# static_dir = where root-relative image urls are looked up, so those assets become page dependencies
+# explain = print why each page is rebuilt
+# pipeline = overlap reading, rendering and writing (see pipeline.py), io_threads = concurrent source reads
+# stream_threshold = see generate_page
+# search_index = optional searchindex.SearchIndex, updated with the postings of every page that gets (re)built
+# assets = see generate_page
+# shard = (index, count) to build only the pages sharding.shard_of assigns to that shard, pages of other shards
+#         are treated like deleted ones
+def generate_page_recursive(dir_path_content, template_path, dest_dir_path, base_path="/", manifest=None, workers=1, stats=None, block_cache_path=None, static_dir=None, explain=False, pipeline=False, io_threads=4, stream_threshold=None, search_index=None, assets=None, shard=None):
+    forget_dirs()
+    pages = collect_pages(dir_path_content, dest_dir_path)
+    if shard is not None:
+        from sharding import in_shard
+        pages = [(from_path, dest_path) for from_path, dest_path in pages if in_shard(from_path, dir_path_content, shard)]
+    collect_stats = stats is not None
+    if pipeline:
+        from pipeline import generate_pages_pipelined
+        generate = lambda jobs, workers: generate_pages_pipelined(jobs, workers, io_threads)
+    else:
+        generate = generate_pages
+    search = search_index is not None
+    if manifest is None:
+        jobs = [
+            _page_job(
+                from_path, template_path, dest_path, base_path, collect_stats=collect_stats, block_cache_path=block_cache_path,
+                stream_threshold=stream_threshold, search=search, assets=assets,
+            )
+            for from_path, dest_path in pages
+        ]
+        results = generate(jobs, workers)
+        _report_results(stats, results, block_cache_path)
+        _record_search(search_index, jobs, results, pages, dest_dir_path)
+        return
+
+    jobs = []
+    entries = {}
+    for from_path, dest_path in pages:
+        entry = {
+            "dest_path": dest_path,
+            "base_path": base_path,
+            # switching --fingerprint or --images on or off, or any published name changing, changes every page's urls
+            "asset_map": None if assets is None else assets.digest,
+            "deps": page_dependencies(from_path, template_path, base_path, static_dir, assets),
+        }
+        reasons = manifest.rebuild_reasons(from_path, entry)
+        if search and from_path not in search_index.pages:
+            reasons.append("not in search index")
+        elif search and not search_index.is_current(from_path, entry["deps"][from_path]):
+            reasons.append("search index out of date")
+        if not reasons:
+            continue
+        if explain:
+            print(f"Rebuilding {from_path}: {', '.join(reasons)}")
+        old_entry = manifest.pages.get(from_path, {})
+        previous_output_hash = old_entry.get("output_hash") if old_entry.get("dest_path") == dest_path else None
+        jobs.append(_page_job(
+            from_path, template_path, dest_path, base_path, collect_stats=collect_stats, block_cache_path=block_cache_path,
+            previous_output_hash=previous_output_hash, stream_threshold=stream_threshold, search=search, assets=assets,
+        ))
+        entries[from_path] = entry
+
+    results = generate(jobs, workers)
+    _report_results(stats, results, block_cache_path)
+    for (from_path, entry), result in zip(entries.items(), results):
+        entry["output_hash"] = result["output_hash"]
+        manifest.record(from_path, entry)
+    unchanged_outputs = sum(1 for result in results if not result["written"])
+    _record_search(search_index, jobs, results, pages, dest_dir_path)
+
+    removed = manifest.pop_missing({from_path for from_path, _ in pages})
+    for entry in removed:
+        print(f"Removing {entry['dest_path']} (source deleted)")
+        remove_output(entry["dest_path"], dest_dir_path)
+    print(f"Pages: {len(jobs)} generated ({unchanged_outputs} with identical output left untouched), {len(pages) - len(jobs)} unchanged, {len(removed)} removed")
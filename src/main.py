@@ -1,18 +1,146 @@
-import sys
+import argparse
+import os
+import shutil
 
-from helperfunctions import copy_from_dir_to_dir, generate_page_recursive
+from assetmap import AssetMap
+from buildmanifest import BuildManifest
+from buildstats import BuildStats
+from config import BLOCK_CACHE_PATH, MANIFEST_PATH, PRECOMPRESS_MIN_SIZE, SEARCH_INDEX_PATH, STREAM_THRESHOLD
+from helperfunctions import sync_dir_to_dir, generate_page_recursive
 
-def main():
-    if len(sys.argv) != 2:
-        base_path = "/"
+# subsystems only some runs use (block cache eviction, search, sharding, precompression, watching) are imported where
+# they're used, so a plain build or --help doesn't pay for sqlite3, gzip or concurrent.futures at startup
+
+WATCH_PATHS = ["./content", "./static", "./template.html", "./layouts", "./partials"]
+
+def _shard_arg(text):
+    from sharding import parse_shard
+    try:
+        return parse_shard(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the static site from ./content and ./static into ./docs.")
+    parser.add_argument("base_path", nargs="?", default="/", help="path the site is served under (default: /)")
+    parser.add_argument("--clean", action="store_true", help="delete ./docs and the build manifest, then rebuild everything")
+    parser.add_argument("--checksum", action="store_true", help="compare static files by content hash when size/mtime differ")
+    parser.add_argument("-j", "--jobs", type=int, default=1, metavar="N", help="render pages in N worker processes (default: 1)")
+    parser.add_argument("--watch", action="store_true", help="keep running and rebuild whenever content, static files or templates change")
+    parser.add_argument("--poll-interval", type=float, default=0.5, metavar="SECONDS", help="how often --watch checks for changes (default: 0.5)")
+    parser.add_argument("--stats", nargs="?", const="-", metavar="JSON", help="print per-stage timings and the slowest pages, and also write them to JSON if a path is given")
+    parser.add_argument("--no-block-cache", action="store_true", help="parse every block instead of reusing html cached by earlier builds")
+    parser.add_argument("--block-cache-size", type=int, default=64, metavar="MB", help="evict least recently used cached blocks above this size (default: 64)")
+    parser.add_argument("--explain", action="store_true", help="print which changed inputs caused each page to be rebuilt")
+    parser.add_argument("--pipeline", action="store_true", help="overlap reading sources, rendering and writing pages through bounded queues")
+    parser.add_argument("--io-threads", type=int, default=4, metavar="N", help="threads reading sources ahead of rendering with --pipeline (default: 4)")
+    parser.add_argument("--stream-threshold", type=int, default=STREAM_THRESHOLD, metavar="BYTES", help=f"render sources of at least BYTES block by block from a memory map instead of loading them whole (default: {STREAM_THRESHOLD})")
+    parser.add_argument("--search", action="store_true", help="write a prefix-sharded search index of every page to ./docs/search")
+    parser.add_argument("--fingerprint", action="store_true", help="copy static files as name.<hash>.ext and point every reference at those copies, so they can be cached forever")
+    parser.add_argument("--precompress", action="store_true", help="write .gz (and .zst where available) siblings for text files in ./docs")
+    parser.add_argument("--precompress-min-size", type=int, default=PRECOMPRESS_MIN_SIZE, metavar="BYTES", help=f"only precompress files of at least BYTES (default: {PRECOMPRESS_MIN_SIZE})")
+    parser.add_argument("--images", action="store_true", help="give images their width and height, lazy loading and async decoding, and publish identical images once")
+    parser.add_argument("--shard", type=_shard_arg, metavar="i/N", help="build only the pages of shard i of N (0 <= i < N), static files are published by shard 0")
+    parser.add_argument("--merge-shards", nargs="+", metavar="DIR", help="replace ./docs with the combined output dirs of every shard, after checking each page was built exactly once")
+    args = parser.parse_args(argv)
+    if args.shard is not None and args.precompress:
+        parser.error("--precompress runs on the merged output, pass it to --merge-shards instead")
+    if args.pipeline and args.stats:
+        parser.error("--stats times each stage of a page in turn and can't be combined with --pipeline")
+    return args
+
+def build(args, manifest, search_index=None):
+    stats = BuildStats() if args.stats else None
+    publish_static = args.shard is None or args.shard[0] == 0
+    manifest.assets = sync_dir_to_dir(
+        "./static", "./docs", previous=manifest.assets, use_hash=args.checksum, fingerprint=args.fingerprint, images=args.images, publish=publish_static,
+    )
+    assets = AssetMap.from_synced(manifest.assets, args.images) if args.fingerprint or args.images else None
+    block_cache_path = None if args.no_block_cache else BLOCK_CACHE_PATH
+    generate_page_recursive(
+        "./content", "./template.html", "./docs", args.base_path,
+        manifest=manifest, workers=args.jobs, stats=stats, block_cache_path=block_cache_path, static_dir="./static",
+        explain=args.explain, pipeline=args.pipeline, io_threads=args.io_threads, stream_threshold=args.stream_threshold,
+        search_index=search_index, assets=assets, shard=args.shard,
+    )
+    if search_index is None and os.path.isdir("./docs/search"):
+        # an index nobody keeps current would send site search to removed or outdated pages,
+        # .build-cache/search.json is kept so turning --search back on only re-indexes what changed
+        shutil.rmtree("./docs/search")
+        print("Search index: removed ./docs/search (built without --search)")
+    if args.shard is not None:
+        from sharding import write_shard_manifest
+        # the search index is written once every shard's postings are merged
+        write_shard_manifest("./docs", args.shard, args.base_path, manifest, "./content", search_index)
+        if search_index is not None:
+            search_index.save(SEARCH_INDEX_PATH)
+    elif search_index is not None:
+        search_index.save(SEARCH_INDEX_PATH)
+        shards = search_index.write("./docs/search", args.base_path)
+        print(f"Search index: {len(search_index.pages)} pages, {shards} shards")
+    if args.precompress:
+        from precompress import precompress_dir
+        manifest.compressed = precompress_dir("./docs", manifest.compressed, args.precompress_min_size)
+    elif manifest.compressed:
+        from precompress import remove_siblings
+        remove_siblings("./docs", list(manifest.compressed))
+        manifest.compressed = {}
+    manifest.save(MANIFEST_PATH)
+    if block_cache_path is not None and os.path.exists(block_cache_path):
+        from blockcache import BlockCache
+        block_cache = BlockCache(block_cache_path, args.block_cache_size * 1024 * 1024)
+        evicted = block_cache.evict()
+        block_cache.close()
+        if evicted:
+            print(f"Block cache: evicted {evicted} least recently used blocks")
+    if stats is not None:
+        stats.finish()
+        stats.print_summary()
+        if args.stats != "-":
+            stats.write_json(args.stats)
+
+def merge(args):
+    from sharding import merge_shards
+    try:
+        merged = merge_shards(args.merge_shards, "./content", "./docs")
+    except ValueError as e:
+        raise SystemExit(f"Can't merge shards:\n{e}")
+    if args.search:
+        if merged["search"] is None:
+            raise SystemExit("Can't write the search index: some shards were built without --search")
+        from searchindex import SearchIndex
+        search_index = SearchIndex({os.path.join("./content", key): page for key, page in merged["search"].items()})
+        shards = search_index.write("./docs/search", merged["base_path"])
+        print(f"Search index: {len(search_index.pages)} pages, {shards} shards")
+    if args.precompress:
+        from precompress import precompress_dir
+        precompress_dir("./docs", None, args.precompress_min_size)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.merge_shards:
+        merge(args)
+        return
+    if not args.base_path.endswith("/"):
+        args.base_path += "/"
+    print(f"[DEBUG] base_path: '{args.base_path}'")
+    if args.search:
+        from searchindex import SearchIndex
+    if args.clean:
+        if os.path.exists("./docs"):
+            shutil.rmtree("./docs")
+        if os.path.exists(BLOCK_CACHE_PATH):
+            os.remove(BLOCK_CACHE_PATH)
+        manifest = BuildManifest()
+        search_index = SearchIndex() if args.search else None
     else:
-        base_path = sys.argv[1]
-    if not base_path.endswith("/"):
-        base_path += "/"
-    print(f"[DEBUG] base_path: '{base_path}'")
-    copy_from_dir_to_dir("./static", "./docs")
-    generate_page_recursive("./content", "./template.html", "./docs", base_path)
+        manifest = BuildManifest.load(MANIFEST_PATH)
+        search_index = SearchIndex.load(SEARCH_INDEX_PATH) if args.search else None
+    build(args, manifest, search_index)
+    if args.watch:
+        from watcher import watch
+        watch([path for path in WATCH_PATHS if os.path.exists(path)], lambda changed: build(args, manifest, search_index), args.poll_interval)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
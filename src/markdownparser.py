@@ -1,8 +1,12 @@
 from config import DELIMITERS
-from nodes.textnode import TextType, TextNode, text_node_to_html_node
+from nodes.textnode import TextType, TextNode, apply_base_path, text_node_to_html_node
+from nodes.leafnode import LeafNode
 from nodes.parentnode import ParentNode
 import re
 from enum import Enum
+from functools import lru_cache
+from itertools import groupby
+import time
 
 class BlockType(Enum):
     PARAGRAPH = "p"
@@ -13,6 +17,20 @@ class BlockType(Enum):
     ORDERED_LIST = "ol"
 
 
+# patterns used by the inline parser, compiled once at import time
+# the image/link alternation relies on '!' being consumed by the image branch, which gives the same
+# result as running the link pattern (with its (?<!!) lookbehind) and then the image pattern
+IMAGE_PATTERN = re.compile(r"!\[([^\[\]]+)\]\(([^\(\)]+)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[([^\[\]]+)\]\(([^\(\)]+)\)")
+LINK_OR_IMAGE_PATTERN = re.compile(r"(!?)\[([^\[\]]+)\]\(([^\(\)]+)\)")
+
+# patterns used by the block classifier and block rewriting, compiled once like the inline ones
+HEADING_PATTERN = re.compile(r"#{1,6} ")
+HEADING_MARKER_PATTERN = re.compile(r"^#{1,6}\s*")
+QUOTE_MARKER_PATTERN = re.compile(r"^>\s*")
+ORDERED_MARKER_PATTERN = re.compile(r"^\d+\.\s*")
+
+
 # params = list filled with nodes.TextType
 # return = list of updated nodes in which every TextNode of TextType.TEXT was properly split if it contained properly placed delimiters mentioned in config.py
 def split_nodes_delimiter(old_nodes):
@@ -100,17 +118,16 @@ def _parse_styled_spans(indexes):
                 start = stack.pop()
                 code_ranges.append((start, pos))
 
-    def is_inside_code(pos):
-        for start, end in code_ranges:
-            if start < pos < end:
-                return True
-        return False
-
-    filtered_events = [
-        (pos, delim, kind)
-        for (pos, delim, kind) in events
-        if not is_inside_code(pos)
-    ]
+    # code ranges come out sorted and never overlap, so one forward walk over both lists is enough
+    filtered_events = []
+    range_index = 0
+    for event in events:
+        pos = event[0]
+        while range_index < len(code_ranges) and code_ranges[range_index][1] <= pos:
+            range_index += 1
+        if range_index < len(code_ranges) and code_ranges[range_index][0] < pos:
+            continue
+        filtered_events.append(event)
 
     return filtered_events
 
@@ -121,20 +138,10 @@ def _parse_styled_spans(indexes):
 # return = dict -> keys = delimiter string, values = list of valid positions (even count only)
 def _find_delimiters_in_text(text, delimiters):
     indexes = {d: [] for d in delimiters}
-    i = 0
 
-    # iterate over the text and try to match any delimiter at current position
-    while i < len(text):
-        matched = False
-        # check for longest delimiters first to avoid partial matches (e.g., '**' before '*')
-        for d in sorted(delimiters, key=len, reverse=True):
-            if text[i:i+len(d)] == d:
-                indexes[d].append(i)  # store the position of the match
-                i += len(d)  # skip ahead by length of matched delimiter
-                matched = True
-                break
-        if not matched:
-            i += 1  # no match at this position, move forward by 1
+    # one regex scan finds every delimiter left to right, skipping past each match
+    for match in _delimiter_pattern(tuple(delimiters)).finditer(text):
+        indexes[match.group()].append(match.start())  # store the position of the match
 
     # make sure each delimiter has an even number of matches (open/close pairs only)
     for d in indexes:
@@ -144,12 +151,18 @@ def _find_delimiters_in_text(text, delimiters):
     return indexes
 
 
+# compiles (once per delimiter set) an alternation that tries the longest delimiters first to avoid partial matches (e.g., '**' before '*')
+@lru_cache(maxsize=None)
+def _delimiter_pattern(delimiters):
+    return re.compile("|".join(re.escape(d) for d in sorted(delimiters, key=len, reverse=True)))
+
+
 # function that finds all markdown image patterns in given text
 # markdown image syntax is: ![alt text](image_url)
 # params = text = str
 # return = list of tuples (alt_text, url)
 def extract_markdown_images(text):
-    return re.findall(r"!\[([^\[\]]+)\]\(([^\(\)]+)\)", text)
+    return IMAGE_PATTERN.findall(text)
 
 
 # function that finds all markdown link patterns in given text
@@ -158,7 +171,7 @@ def extract_markdown_images(text):
 # params = text = str
 # return = list of tuples (link_text, url)
 def extract_markdown_links(text):
-    return re.findall(r"(?<!!)\[([^\[\]]+)\]\(([^\(\)]+)\)", text)
+    return LINK_PATTERN.findall(text)
 
 
 # params = list filled with nodes.TextType
@@ -176,18 +189,10 @@ def split_nodes_image(old_nodes):
         text = node.text
         last_pos = 0
 
-        # call the function expecting it to extract image matches
-        images = extract_markdown_images(text)
-
-        # iterate over each extracted image tuple (alt text, url)
-        for image in images:
-            to_find = f"![{image[0]}]({image[1]})"  # reconstruct the exact markdown substring
-
-            # find the position of the image markdown substring inside the text
-            start = text.find(to_find)
-            if start == -1:
-                continue
-            end = start + len(to_find)
+        # iterate over each image match, the match already knows where it sits in the text
+        # (searching the text again for the markdown would find the first of two identical images)
+        for match in IMAGE_PATTERN.finditer(text):
+            start, end = match.span()
 
             # if there's plain text before the image, add it as a new node
             if start > last_pos:
@@ -195,7 +200,7 @@ def split_nodes_image(old_nodes):
                 new_nodes.append(TextNode(before_text, TextType.TEXT))
 
             # add the image as a TextNode of type IMAGE
-            new_nodes.append(TextNode(image[0], TextType.IMAGE, image[1]))
+            new_nodes.append(TextNode(match.group(1), TextType.IMAGE, match.group(2)))
 
             # update the last processed index
             last_pos = end
@@ -223,18 +228,10 @@ def split_nodes_links(old_nodes):
         text = node.text
         last_pos = 0
 
-        # call the function expecting it to extract link matches
-        links = extract_markdown_links(text)
-
-        # iterate over each extracted link tuple (link text, url)
-        for link in links:
-            to_find = f"[{link[0]}]({link[1]})"  # reconstruct the exact markdown substring
-
-            # find the position of the link markdown substring inside the text
-            start = text.find(to_find)
-            if start == -1:
-                continue
-            end = start + len(to_find)
+        # iterate over each link match, the match already knows where it sits in the text
+        # (searching the text again for the markdown would find the first of two identical links)
+        for match in LINK_PATTERN.finditer(text):
+            start, end = match.span()
 
             # if there's plain text before the link, add it as a new node
             if start > last_pos:
@@ -242,7 +239,7 @@ def split_nodes_links(old_nodes):
                 new_nodes.append(TextNode(before_text, TextType.TEXT))
 
             # add the link as a TextNode of type LINK
-            new_nodes.append(TextNode(link[0], TextType.LINK, link[1]))
+            new_nodes.append(TextNode(match.group(1), TextType.LINK, match.group(2)))
 
             # update the last processed index
             last_pos = end
@@ -254,59 +251,291 @@ def split_nodes_links(old_nodes):
 
     return new_nodes
 
+# single left-to-right inline scanner, produces the same TextNode stream as
+# split_nodes_image(split_nodes_links(split_nodes_delimiter([node]))) without building the intermediate lists
+# params = text = str
+# return = list of TextNodes
 def text_to_textnodes(text):
-    node = TextNode(text, TextType.TEXT)
-    return split_nodes_image(split_nodes_links(split_nodes_delimiter([node])))
+    new_nodes = []
+    events = _parse_styled_spans(_find_delimiters_in_text(text, DELIMITERS.keys()))
+
+    active_styles = []  # keeps track of currently open styles
+    last_pos = 0  # last processed character index
+
+    for pos, delim, kind in events:
+        if pos > last_pos:
+            _append_span(new_nodes, text, last_pos, pos, active_styles)
+
+        style = DELIMITERS[delim]
+        if kind == 'open':
+            active_styles.append(style)
+        elif kind == 'close':
+            if style in active_styles:
+                active_styles.remove(style)
+        last_pos = pos + len(delim)
+
+    if last_pos < len(text):
+        _append_span(new_nodes, text, last_pos, len(text), active_styles)
+
+    return new_nodes
+
+
+# appends the nodes for text[start:end]: styled spans get one node per active style (like split_nodes_delimiter),
+# plain spans are scanned for links and images right away instead of in two extra passes
+def _append_span(new_nodes, text, start, end, active_styles):
+    if active_styles:
+        span_text = text[start:end]
+        for style in active_styles:
+            new_nodes.append(TextNode(span_text, style))
+        return
+
+    last_pos = start
+    for match in LINK_OR_IMAGE_PATTERN.finditer(text, start, end):
+        if match.start() > last_pos:
+            new_nodes.append(TextNode(text[last_pos:match.start()], TextType.TEXT))
+        text_type = TextType.IMAGE if match.group(1) else TextType.LINK
+        new_nodes.append(TextNode(match.group(2), text_type, match.group(3)))
+        last_pos = match.end()
+    if last_pos < end:
+        new_nodes.append(TextNode(text[last_pos:end], TextType.TEXT))
+
+# generator over the lines of text, so the document is never copied into a list of lines
+# params = text = str
+# return = yields each line without its trailing newline
+def iter_lines(text):
+    start = 0
+    while True:
+        end = text.find("\n", start)
+        if end == -1:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
+
+
+# line-oriented block splitter: blocks are separated by blank (or whitespace only) lines
+# params = lines = any iterable of str lines (iter_lines(text), an open file, ...)
+# return = yields (BlockType, list of stripped lines) per block, already classified
+def iter_blocks(lines):
+    block_lines = []
+    for line in lines:
+        line = line.strip()
+        if line:
+            block_lines.append(line)
+        elif block_lines:
+            yield block_lines_to_block_type(block_lines), block_lines
+            block_lines = []
+    if block_lines:
+        yield block_lines_to_block_type(block_lines), block_lines
 
 def markdown_to_blocks(markdown):
-    raw_blocks = re.split(r'\n\s*\n', markdown.strip())
-    blocks = []
-    for block in raw_blocks:
-        lines = [line.strip() for line in block.splitlines()]
-        blocks.append('\n'.join(lines))
-    return blocks
+    blocks = ['\n'.join(lines) for _, lines in iter_blocks(iter_lines(markdown))]
+    # an empty document has always been a single empty block
+    return blocks or [""]
 
 def block_to_block_type(block):
-    lines = block.splitlines()
-    if (len(lines) == 0):
-        return BlockType.PARAGRAPH
-    if (re.match(r"^#{1,6} ", lines[0])):
-        return BlockType.HEADING
-    if block.startswith("```") and block.endswith("```"):
-        return BlockType.CODE
-    if all(line.startswith(">") for line in lines):
-        return BlockType.QUOTE
-    if all(re.match(r"^- ", line) for line in lines):
-        return BlockType.UNORDERED_LIST
-    if all(re.match(r"^\d+\. ", line) for line in lines):
-        for i, line in enumerate(lines):
-            expected_prefix = f"{i + 1}. "
-            if not line.startswith(expected_prefix):
-                break
-        else:
-            return BlockType.ORDERED_LIST
+    return block_lines_to_block_type(block.splitlines())
+
+def block_lines_to_block_type(lines):
+    if lines:
+        for check, block_type in BLOCK_RULES.get(lines[0][:1], ()):
+            if check(lines):
+                return block_type
     return BlockType.PARAGRAPH
 
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
+# block classifier rules: first character of a block's first line -> [(check, BlockType)]
+# only the rules registered for that character are tried, in order, and the first check accepting the block's lines
+# decides its type; blocks no rule accepts are paragraphs. Each check reads every line at most once, so new block
+# types (tables on "|", rules on "-" / "*") cost nothing for blocks starting with any other character
+BLOCK_RULES = {}
+
+def register_block_rule(first_chars, block_type, check):
+    for char in first_chars:
+        BLOCK_RULES.setdefault(char, []).append((check, block_type))
+
+def _is_heading(lines):
+    return HEADING_PATTERN.match(lines[0]) is not None
+
+def _is_code(lines):
+    return lines[0].startswith("```") and lines[-1].endswith("```")
+
+def _is_quote(lines):
+    return all(line.startswith(">") for line in lines)
+
+def _is_unordered_list(lines):
+    return all(line.startswith("- ") for line in lines)
+
+def _is_ordered_list(lines):
+    # items have to be numbered 1, 2, 3, ... in order, so only blocks starting with "1" can be ordered lists
+    return all(line.startswith(f"{number}. ") for number, line in enumerate(lines, 1))
+
+register_block_rule("#", BlockType.HEADING, _is_heading)
+register_block_rule("`", BlockType.CODE, _is_code)
+register_block_rule(">", BlockType.QUOTE, _is_quote)
+register_block_rule("-", BlockType.UNORDERED_LIST, _is_unordered_list)
+register_block_rule("1", BlockType.ORDERED_LIST, _is_ordered_list)
+
+# bump whenever the html produced for a block changes, so cached blocks from older parsers aren't reused
+PARSER_VERSION = 1
+
+# base_path = prefix for root-relative link and image urls (see nodes.textnode.apply_base_path)
+# assets = optional assetmap.AssetMap of fingerprinted static urls
+# stats = optional buildstats.PageStats, when given the block split, inline parse and html tree stages are timed
+# block_cache = optional blockcache.BlockCache, blocks found there are not parsed again
+# text_sink = optional list (or anything with append, like searchindex.PostingsSink), gets the plain text of every
+#             block appended in document order (for the search index)
+def markdown_to_html_node(markdown, base_path="/", stats=None, block_cache=None, text_sink=None, assets=None):
+    if stats is not None:
+        return _timed_markdown_to_html_node(markdown, base_path, stats, block_cache, text_sink, assets)
     children = []
-    for block in blocks:
-        block_type = block_to_block_type(block)
-        tag = block_type.value
-        if (block_type == BlockType.HEADING):
-            tag += str(count_leading_hashes(block))
-            block_children = text_to_children(modify_block(block, block_type))
+    for block_type, lines in iter_blocks(iter_lines(markdown)):
+        if block_cache is None:
+            children.append(block_to_html_node(block_type, lines, base_path, text_sink, assets))
+        else:
+            children.append(_cached_block_node(block_type, lines, base_path, block_cache, text_sink, assets))
+    return ParentNode("div", children)
+
+# cached html waiting to be written is flushed to the database once it reaches this many characters, so a streamed
+# page with a block cache holds a bounded amount of it instead of every block it missed
+STREAM_FLUSH_SIZE = 256 * 1024
+
+# document parsed lazily for pages too large to hold as one tree: render_to parses, writes and drops one block
+# at a time, producing the same html as markdown_to_html_node(...).to_html()
+# lines = iterable of str lines (e.g. read from an mmap), consumed by the first render_to
+# text_sink should consume text as it comes (searchindex.PostingsSink), a list would keep the whole page's text
+class StreamedMarkdown:
+    __slots__ = ("lines", "base_path", "block_cache", "text_sink", "assets")
+
+    def __init__(self, lines, base_path="/", block_cache=None, text_sink=None, assets=None):
+        self.lines = lines
+        self.base_path = base_path
+        self.block_cache = block_cache
+        self.text_sink = text_sink
+        self.assets = assets
+
+    def render_to(self, writer):
+        write = writer.append if isinstance(writer, list) else writer.write
+        write("<div>")
+        for block_type, lines in iter_blocks(self.lines):
+            if self.block_cache is None:
+                block_to_html_node(block_type, lines, self.base_path, self.text_sink, self.assets).render_to(writer)
+            else:
+                _cached_block_node(block_type, lines, self.base_path, self.block_cache, self.text_sink, self.assets).render_to(writer)
+                if self.block_cache.pending_size >= STREAM_FLUSH_SIZE:
+                    self.block_cache.flush()
+        write("</div>")
+
+def block_to_html_node(block_type, lines, base_path="/", text_sink=None, assets=None):
+    return ParentNode(_block_tag(block_type, lines), text_to_children(modify_block_lines(lines, block_type), base_path, text_sink, assets))
+
+# a block's plain text is cached next to its html, under a key no base_path can produce
+TEXT_KEY_SCOPE = "\0text"
+
+# cached blocks come back as rendered html, wrapped in a tagless LeafNode which renders its value as is
+def _cached_block_node(block_type, lines, base_path, block_cache, text_sink=None, assets=None):
+    key = block_cache.key(PARSER_VERSION, _url_scope(base_path, assets), block_type, lines)
+    html = _cached_block_html(key, block_type, lines, block_cache, text_sink)
+    if html is None:
+        block_text = [] if text_sink is not None else None
+        html = block_to_html_node(block_type, lines, base_path, block_text, assets).to_html()
+        block_cache.put(key, html)
+        if block_text is not None:
+            _store_block_text(block_type, lines, block_cache, block_text[0])
+            text_sink.append(block_text[0])
+    return LeafNode(html)
+
+# return = the block's cached html, or None when it has to be parsed, which includes search needing its text and that
+# not being cached. A hit feeds the cached text to text_sink; every block counts as one hit or one miss, the text
+# lookup isn't counted on its own
+def _cached_block_html(key, block_type, lines, block_cache, text_sink):
+    html = block_cache.get(key, count=False)
+    if html is not None and text_sink is not None:
+        text = _cached_block_text(block_type, lines, block_cache)
+        if text is None:
+            html = None
         else:
-            block_children = text_to_children(modify_block(block, block_type))
-        children.append(ParentNode(tag,block_children))
+            text_sink.append(text)
+    block_cache.count(html is not None)
+    return html
+
+# everything that changes the urls in a block's html, cached html is only reused within the same scope
+def _url_scope(base_path, assets):
+    return base_path if assets is None else f"{base_path}\0{assets.digest}"
+
+def _cached_block_text(block_type, lines, block_cache):
+    return block_cache.get(block_cache.key(PARSER_VERSION, TEXT_KEY_SCOPE, block_type, lines), count=False)
+
+def _store_block_text(block_type, lines, block_cache, text):
+    block_cache.put(block_cache.key(PARSER_VERSION, TEXT_KEY_SCOPE, block_type, lines), text)
+
+# nested styles come out of text_to_textnodes as consecutive nodes with the same text, each span counts once
+def _block_text(text_nodes):
+    return "".join(text for text, _ in groupby(node.text for node in text_nodes))
+
+def _block_tag(block_type, lines):
+    tag = block_type.value
+    if (block_type == BlockType.HEADING):
+        tag += str(count_leading_hashes(lines[0]))
+    return tag
+
+# same as the untimed path, split into its stages so each one can be clocked separately
+def _timed_markdown_to_html_node(markdown, base_path, stats, block_cache=None, text_sink=None, assets=None):
+    clock = time.perf_counter
+    children = []
+    blocks = iter_blocks(iter_lines(markdown))
+    while True:
+        started = clock()
+        block = next(blocks, None)
+        split_done = clock()
+        stats.add("block_split", split_done - started)
+        if block is None:
+            break
+        block_type, lines = block
+
+        if block_cache is not None:
+            key = block_cache.key(PARSER_VERSION, _url_scope(base_path, assets), block_type, lines)
+            html = _cached_block_html(key, block_type, lines, block_cache, text_sink)
+            lookup_done = clock()
+            stats.add("block_cache", lookup_done - split_done)
+            split_done = lookup_done
+            if html is not None:
+                stats.cache_hits += 1
+                stats.nodes += 1
+                children.append(LeafNode(html))
+                continue
+            stats.cache_misses += 1
+
+        text_nodes = text_to_textnodes(modify_block_lines(lines, block_type))
+        if text_sink is not None:
+            text = _block_text(text_nodes)
+            text_sink.append(text)
+            if block_cache is not None:
+                _store_block_text(block_type, lines, block_cache, text)
+        inline_done = clock()
+        block_children = nested_nodes_checker(text_nodes, base_path, assets)
+        block_node = ParentNode(_block_tag(block_type, lines), block_children)
+        tree_done = clock()
+        stats.add("inline_parse", inline_done - split_done)
+        stats.add("html_tree", tree_done - inline_done)
+        stats.nodes += 1 + len(block_children)
+
+        if block_cache is not None:
+            html = block_node.to_html()
+            block_cache.put(key, html)
+            stats.add("render", clock() - tree_done)
+            block_node = LeafNode(html)
+        children.append(block_node)
+    stats.nodes += 1
     return ParentNode("div", children)
 
-def text_to_children(text):
+def text_to_children(text, base_path="/", text_sink=None, assets=None):
     text_nodes = text_to_textnodes(text)
-    return nested_nodes_checker(text_nodes)
+    if text_sink is not None:
+        text_sink.append(_block_text(text_nodes))
+    return nested_nodes_checker(text_nodes, base_path, assets)
 
 
-def nested_nodes_checker(text_nodes):
+def nested_nodes_checker(text_nodes, base_path="/", assets=None):
     if not text_nodes:
         raise Exception("Block doesn't have any nodes!")
 
@@ -322,21 +551,21 @@ def nested_nodes_checker(text_nodes):
             j += 1
 
         if len(group) == 1:
-            html_nodes.append(text_node_to_html_node(current))
+            html_nodes.append(text_node_to_html_node(current, base_path, assets))
         else:
-            html_nodes.append(build_nested_html(group))
+            html_nodes.append(build_nested_html(group, base_path, assets))
         i = j
     return html_nodes
 
-def build_nested_html(group):
+def build_nested_html(group, base_path="/", assets=None):
     new_group = modify_if_code(group)
-    node = text_node_to_html_node(new_group[-1])
+    node = text_node_to_html_node(new_group[-1], base_path, assets)
     if node.tag == "code":
         return node
     for text_node in reversed(new_group[:-1]):
         tag = get_tag_from_text_type(text_node.text_type)
         if tag == "a":
-            node = ParentNode(tag, [node], props={"href": text_node.url})
+            node = ParentNode(tag, [node], props={"href": apply_base_path(text_node.url, base_path, assets)})
         else:
             node = ParentNode(tag, [node])
     return node
@@ -376,11 +605,14 @@ def count_leading_hashes(text):
     return count
 
 def modify_block(block, block_type):
-    lines = block.splitlines()
+    return modify_block_lines(block.splitlines(), block_type)
 
+# params = lines = list of the block's stripped lines, block_type = BlockType of the block
+# return = the block's text with the block markup removed, ready for the inline parser
+def modify_block_lines(lines, block_type):
     if block_type == BlockType.HEADING:
         # Only modify first line
-        return re.sub(r"^#{1,6}\s*", "", lines[0])
+        return HEADING_MARKER_PATTERN.sub("", lines[0])
 
 #TODO : handle markdown backticks starting or ending in line with text
     elif block_type == BlockType.CODE:
@@ -396,7 +628,7 @@ def modify_block(block, block_type):
 
     elif block_type == BlockType.QUOTE:
         # Remove leading '>' (already stripped of space)
-        return "".join(re.sub(r"^>\s*", "", line).lstrip() for line in lines)
+        return "".join(QUOTE_MARKER_PATTERN.sub("", line).lstrip() for line in lines)
 
     elif block_type == BlockType.UNORDERED_LIST:
         return "".join(
@@ -406,12 +638,12 @@ def modify_block(block, block_type):
     elif block_type == BlockType.ORDERED_LIST:
         return "".join(
             [
-                "<li>{}</li>".format(re.sub(r'^\d+\.\s*', '', line).strip())
+                "<li>{}</li>".format(ORDERED_MARKER_PATTERN.sub('', line).strip())
                 for line in lines
             ]
         )
 
     elif block_type == BlockType.PARAGRAPH:
-        return ' '.join(line.strip() for line in block.splitlines())
+        return ' '.join(line.strip() for line in lines)
     else:
-        return block
+        return '\n'.join(lines)
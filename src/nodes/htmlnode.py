@@ -1,4 +1,7 @@
 class HTMLNode:
+    # no per-instance __dict__, subclasses declare empty __slots__ to keep it that way
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self,tag=None,value=None,children=None,props=None):
         self.tag = tag
         self.value = value
@@ -8,6 +11,27 @@ class HTMLNode:
     def to_html(self):
         raise NotImplementedError("not properly implemented")
 
+    # returns (opening chunk, children, closing chunk) for render_to
+    def _render_parts(self):
+        raise NotImplementedError("not properly implemented")
+
+    # writes the html of this node and its whole subtree chunk by chunk into writer,
+    # which can be a list (chunks get appended) or anything with a write method (io.StringIO, open file)
+    # uses an explicit stack instead of recursion, so deep trees can't hit the recursion limit
+    def render_to(self, writer):
+        write = writer.append if isinstance(writer, list) else writer.write
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                write(node)
+                continue
+            opening, children, closing = node._render_parts()
+            write(opening)
+            if closing is not None:
+                stack.append(closing)
+            stack.extend(reversed(children))
+
     def props_to_html(self):
         props = ""
         for elem in self.props:
@@ -16,4 +40,3 @@ class HTMLNode:
 
     def __repr__(self):
         return f"HTMLNode({self.tag}, {self.value}, {self.children}, {self.props})"
-
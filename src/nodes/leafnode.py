@@ -1,6 +1,8 @@
 from nodes.htmlnode import HTMLNode
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, value, tag=None, props=None):
         super().__init__(tag,value,None,props)
 
@@ -15,3 +17,6 @@ class LeafNode(HTMLNode):
                 string_to_html += f" {self.props_to_html()}"
             string_to_html += f">{self.value}</{self.tag}>"
             return string_to_html
+
+    def _render_parts(self):
+        return self.to_html(), (), None
@@ -1,20 +1,23 @@
 from nodes.htmlnode import HTMLNode
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag,children, props=None):
         super().__init__(tag,None,children,props)
 
     def to_html(self):
+        chunks = []
+        self.render_to(chunks)
+        return "".join(chunks)
+
+    def _render_parts(self):
         if self.tag is None:
             raise ValueError("All parent nodes must have a tag.")
         if self.children is None:
             raise ValueError("All parent nodes must have children defined.")
-        else:
-            string_to_html = f"<{self.tag}"
-            if self.props:
-                string_to_html += f" {self.props_to_html()}"
-            string_to_html += ">"
-            for child in self.children:
-                string_to_html += child.to_html()
-            string_to_html += f"</{self.tag}>"
-            return string_to_html
\ No newline at end of file
+        opening = f"<{self.tag}"
+        if self.props:
+            opening += f" {self.props_to_html()}"
+        opening += ">"
+        return opening, self.children, f"</{self.tag}>"
@@ -11,6 +11,9 @@ class TextType(Enum):
     IMAGE = "image"
 
 class TextNode:
+    # no per-instance __dict__, large documents create a lot of these
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type
@@ -22,7 +25,19 @@ class TextNode:
     def __repr__(self):
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
 
-def text_node_to_html_node(text_node):
+# prefixes root-relative urls ("/images/x.png") with the site's base_path ("/blog/" -> "/blog/images/x.png")
+# protocol-relative ("//host/...") and relative urls are left alone
+# assets = optional assetmap.AssetMap, root-relative urls of static files are swapped for their fingerprinted copies
+def apply_base_path(url, base_path, assets=None):
+    if not url or not url.startswith("/") or url.startswith("//"):
+        return url
+    if assets is not None:
+        url = assets.rewrite(url)
+    if base_path == "/":
+        return url
+    return base_path + url[1:]
+
+def text_node_to_html_node(text_node, base_path="/", assets=None):
     match(text_node.text_type):
         case(TextType.TEXT):
             return LeafNode(value = text_node.text)
@@ -33,8 +48,11 @@ def text_node_to_html_node(text_node):
         case(TextType.CODE):
             return LeafNode(value = text_node.text, tag= "code")
         case(TextType.LINK):
-            return LeafNode(value = text_node.text, tag= "a", props={"href": text_node.url})
+            return LeafNode(value = text_node.text, tag= "a", props={"href": apply_base_path(text_node.url, base_path, assets)})
         case(TextType.IMAGE):
-            return LeafNode(value = "", tag= "img", props={"src": text_node.url, "alt": text_node.text})
+            props = {"src": apply_base_path(text_node.url, base_path, assets), "alt": text_node.text}
+            if assets is not None:
+                props.update(assets.image_props(text_node.url))
+            return LeafNode(value = "", tag= "img", props=props)
         case _:
             raise ValueError(f"Unknown TextType: {text_node.text_type}")
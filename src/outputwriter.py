@@ -0,0 +1,70 @@
+import hashlib
+import locale
+import os
+import tempfile
+
+from buildmanifest import hash_file
+
+# files created through mkstemp are 0600, published pages get the usual permissions
+_umask = os.umask(0)
+os.umask(_umask)
+FILE_MODE = 0o666 & ~_umask
+
+
+class OutputWriter:
+    # writes a file through a temp file in the same directory, hashing the bytes on the way
+    # when the result is identical to what's already at dest_path the temp file is dropped and the old
+    # file (and its mtime) stays untouched, otherwise the temp file is renamed into place
+    # previous_digest = sha256 recorded when dest_path was last written, saves reading the old file back
+    def __init__(self, dest_path, previous_digest=None, encoding=None):
+        self.dest_path = dest_path
+        self.previous_digest = previous_digest
+        self.encoding = encoding or locale.getpreferredencoding(False)
+        self.digest = None
+        self.written = False
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._file = None
+        self._tmp_path = None
+
+    def __enter__(self):
+        directory = os.path.dirname(self.dest_path) or "."
+        fd, self._tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(self.dest_path)}.", suffix=".tmp")
+        self._file = os.fdopen(fd, 'wb')
+        return self
+
+    def write(self, chunk):
+        # str chunks are encoded, bytes (compressed siblings) go through as is
+        data = chunk if isinstance(chunk, bytes) else chunk.encode(self.encoding)
+        self._hash.update(data)
+        self._file.write(data)
+        self.size += len(data)
+
+    def writelines(self, chunks):
+        for chunk in chunks:
+            self.write(chunk)
+
+    def _unchanged(self):
+        try:
+            size = os.path.getsize(self.dest_path)
+        except FileNotFoundError:
+            return False
+        if size != self.size:
+            return False
+        if self.previous_digest is not None:
+            return self.previous_digest == self.digest
+        return hash_file(self.dest_path) == self.digest
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+        if exc_type is not None:
+            os.remove(self._tmp_path)
+            return False
+        self.digest = self._hash.hexdigest()
+        if self._unchanged():
+            os.remove(self._tmp_path)
+        else:
+            os.chmod(self._tmp_path, FILE_MODE)
+            os.replace(self._tmp_path, self.dest_path)
+            self.written = True
+        return False
@@ -0,0 +1,134 @@
+import io
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from blockcache import get_block_cache
+from helperfunctions import _generate_page_job, ensure_dir, postings_sink, read_source, render_page, search_entry, should_stream
+from outputwriter import OutputWriter
+
+# pages allowed to wait between two stages, this bounds memory no matter how large the site is
+QUEUE_SIZE = 16
+
+_DONE = object()
+
+
+# builds pages in three overlapping stages so reads and writes don't stall rendering:
+#   readers (io_threads threads) -> render (inline or `workers` processes) -> writer (one thread)
+# the stages are joined by bounded queues, a slow stage blocks the one feeding it instead of piling up pages
+# jobs / return = same as helperfunctions.generate_pages (per-page stats aren't collected, "stats" is None)
+# sources above the job's stream_threshold skip the read stage and are streamed straight to their output by the
+# render stage, so they're never held in memory as a whole
+def generate_pages_pipelined(jobs, workers=1, io_threads=4, queue_size=QUEUE_SIZE):
+    results = [None] * len(jobs)
+    if not jobs:
+        return results
+    read_queue = queue.Queue(maxsize=queue_size)
+    write_queue = queue.Queue(maxsize=queue_size)
+    errors = []
+
+    reader = threading.Thread(target=_read_stage, args=(jobs, io_threads, read_queue), daemon=True)
+    writer = threading.Thread(target=_write_stage, args=(write_queue, results, errors), daemon=True)
+    reader.start()
+    writer.start()
+    try:
+        if workers <= 1:
+            _render_inline(read_queue, write_queue)
+        else:
+            _render_in_processes(read_queue, write_queue, min(workers, len(jobs)), queue_size)
+    finally:
+        write_queue.put(_DONE)
+        # unblock the reader if rendering stopped early
+        while reader.is_alive():
+            _drain(read_queue)
+            reader.join(0.05)
+        writer.join()
+    if errors:
+        raise errors[0]
+    return results
+
+def _read_stage(jobs, io_threads, read_queue):
+    with ThreadPoolExecutor(max_workers=max(1, io_threads)) as pool:
+        for index, job in enumerate(jobs):
+            # the read runs ahead in the pool, put() blocks once queue_size reads are waiting to be rendered
+            read_queue.put((index, job, pool.submit(_read_source, job["from_path"], job.get("stream_threshold"))))
+    read_queue.put(_DONE)
+
+def _read_source(from_path, stream_threshold=None):
+    if should_stream(from_path, stream_threshold):
+        return None
+    return read_source(from_path)
+
+def _render_job(job, source):
+    # runs in the render stage, returns the finished page text so only a string crosses process boundaries
+    block_cache_path = job.get("block_cache_path")
+    block_cache = get_block_cache(block_cache_path) if block_cache_path is not None else None
+    if block_cache is not None:
+        hits, misses = block_cache.hits, block_cache.misses
+    text_sink = postings_sink(job.get("search"))
+    template, values = render_page(
+        source, job["from_path"], job["template_path"], job["dest_path"], job["base_path"], block_cache=block_cache, text_sink=text_sink, assets=job.get("assets"),
+    )
+    page = io.StringIO()
+    template.render_to(page, values)
+    page = page.getvalue()
+    search = search_entry(values["Title"], text_sink)
+    if block_cache is None:
+        return page, 0, 0, search
+    block_cache.flush()
+    return page, block_cache.hits - hits, block_cache.misses - misses, search
+
+def _render_inline(read_queue, write_queue):
+    while (item := read_queue.get()) is not _DONE:
+        index, job, source = item
+        source = source.result()
+        # a streamed page comes back already written, as a finished result
+        rendered = _generate_page_job(dict(job, collect_stats=False)) if source is None else _render_job(job, source)
+        write_queue.put((index, job, rendered))
+
+def _render_in_processes(read_queue, write_queue, workers, queue_size):
+    in_flight = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while (item := read_queue.get()) is not _DONE:
+            index, job, source = item
+            source = source.result()
+            if source is None:
+                rendered = executor.submit(_generate_page_job, dict(job, collect_stats=False))
+            else:
+                rendered = executor.submit(_render_job, job, source)
+            in_flight.append((index, job, rendered))
+            # keep every worker busy but never hold more than queue_size rendered pages in memory
+            if len(in_flight) >= max(queue_size, workers):
+                index, job, rendered = in_flight.popleft()
+                write_queue.put((index, job, rendered.result()))
+        while in_flight:
+            index, job, rendered = in_flight.popleft()
+            write_queue.put((index, job, rendered.result()))
+
+def _write_stage(write_queue, results, errors):
+    while (item := write_queue.get()) is not _DONE:
+        if errors:
+            # keep draining so the render stage never blocks on a dead writer
+            continue
+        index, job, rendered = item
+        if isinstance(rendered, dict):
+            results[index] = rendered
+            continue
+        page, hits, misses, search = rendered
+        try:
+            ensure_dir(os.path.dirname(job["dest_path"]))
+            with OutputWriter(job["dest_path"], job.get("previous_output_hash")) as writer:
+                writer.write(page)
+        except Exception as e:
+            errors.append(e)
+            continue
+        results[index] = {"output_hash": writer.digest, "written": writer.written, "stats": None, "search": search, "cache_hits": hits, "cache_misses": misses}
+
+def _drain(q):
+    try:
+        while True:
+            q.get_nowait()
+    except queue.Empty:
+        pass
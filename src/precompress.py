@@ -0,0 +1,81 @@
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from buildmanifest import hash_file
+from config import PRECOMPRESS_MIN_SIZE
+from helperfunctions import remove_output
+from outputwriter import OutputWriter
+
+try:
+    from compression import zstd
+except ImportError:  # only in the stdlib from Python 3.14
+    zstd = None
+
+COMPRESSIBLE_EXTENSIONS = {".html", ".css", ".js", ".mjs", ".json", ".svg", ".txt", ".xml", ".map"}
+
+
+def _gzip(data):
+    # mtime=0 keeps the output byte-identical between builds
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+def _zstd(data):
+    return zstd.compress(data, level=19)
+
+# file suffix -> compress function, for every format this Python can write
+ENCODINGS = {".gz": _gzip}
+if zstd is not None:
+    ENCODINGS[".zst"] = _zstd
+
+
+def should_compress(path, size, min_size=PRECOMPRESS_MIN_SIZE):
+    return size >= min_size and os.path.splitext(path)[1].lower() in COMPRESSIBLE_EXTENSIONS
+
+# writes precompressed siblings (index.html.gz, index.html.zst) next to every compressible file under out_dir
+# previous = the record returned by the last run, output path relative to out_dir -> {"size", "mtime_ns", "hash"}
+#            files whose stat or, failing that, whose digest matches it keep their existing siblings
+# workers = compression threads, zlib and zstd release the GIL while they work
+# return = the new record
+def precompress_dir(out_dir, previous=None, min_size=PRECOMPRESS_MIN_SIZE, workers=None):
+    previous = previous or {}
+    compressed = {}
+    todo = []
+    for root, _, file_names in os.walk(out_dir):
+        for file_name in file_names:
+            path = os.path.join(root, file_name)
+            rel_path = os.path.relpath(path, out_dir)
+            stat = os.stat(path)
+            if not should_compress(path, stat.st_size, min_size):
+                continue
+            entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            old_entry = previous.get(rel_path)
+            siblings_exist = all(os.path.exists(path + suffix) for suffix in ENCODINGS)
+            if old_entry is not None and siblings_exist and old_entry["size"] == entry["size"] and old_entry["mtime_ns"] == entry["mtime_ns"]:
+                compressed[rel_path] = dict(old_entry)
+                continue
+            entry["hash"] = hash_file(path)
+            compressed[rel_path] = entry
+            if old_entry is not None and siblings_exist and old_entry.get("hash") == entry["hash"]:
+                continue
+            todo.append(path)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(_compress_file, todo))
+
+    removed = remove_siblings(out_dir, [rel_path for rel_path in previous if rel_path not in compressed])
+    print(f"Precompressed: {len(todo)} compressed ({', '.join(ENCODINGS)}), {len(compressed) - len(todo)} unchanged, {len(removed)} removed")
+    return compressed
+
+# drops the siblings of files that are gone or no longer compressed, and directories left empty by that
+def remove_siblings(out_dir, rel_paths):
+    for rel_path in rel_paths:
+        for suffix in (".gz", ".zst"):
+            remove_output(os.path.join(out_dir, rel_path + suffix), out_dir)
+    return rel_paths
+
+def _compress_file(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    for suffix, compress in ENCODINGS.items():
+        with OutputWriter(path + suffix) as writer:
+            writer.write(compress(data))
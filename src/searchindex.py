@@ -0,0 +1,113 @@
+import json
+import os
+import re
+
+from outputwriter import OutputWriter
+
+SEARCH_INDEX_VERSION = 1
+# terms are bucketed into one shard file per leading PREFIX_LENGTH characters, the browser only fetches the
+# shards for the prefixes of what's being searched
+PREFIX_LENGTH = 2
+# the parser passes list items through as literal <li> markup, it isn't searchable text
+MARKUP_PATTERN = re.compile(r"<[^<>]*>")
+TERM_PATTERN = re.compile(r"\w+")
+
+
+# text = iterable of plain text strings in document order (the text of a page's TextNodes)
+# return = {term: [positions]}, positions count every word of the page, terms shorter than PREFIX_LENGTH are dropped
+def page_postings(text):
+    sink = PostingsSink()
+    for chunk in text:
+        sink.append(chunk)
+    return sink.terms
+
+
+# a text sink for the parser (see markdownparser.markdown_to_html_node) that turns each block's text into postings
+# as it arrives, so the text itself is never kept; terms = page_postings of everything appended so far
+class PostingsSink:
+    __slots__ = ("terms", "position")
+
+    def __init__(self):
+        self.terms = {}
+        self.position = 0
+
+    def append(self, chunk):
+        for match in TERM_PATTERN.finditer(MARKUP_PATTERN.sub(" ", chunk).lower()):
+            term = match.group()
+            if len(term) >= PREFIX_LENGTH:
+                self.terms.setdefault(term, []).append(self.position)
+            self.position += 1
+
+
+class SearchIndex:
+    # inverted index kept between builds so only rebuilt pages have to be re-indexed
+    def __init__(self, pages=None):
+        # source path -> {"path": output path relative to the site root, "title", "terms": {term: [positions]},
+        #                 "source_hash": hash of the source the postings were taken from}
+        self.pages = pages if pages is not None else {}
+
+    @classmethod
+    def load(cls, path):
+        # like the build manifest, a missing or stale index just means every page gets indexed again
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        if not isinstance(data, dict) or data.get("version") != SEARCH_INDEX_VERSION:
+            return cls()
+        return cls(pages=data.get("pages", {}))
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"version": SEARCH_INDEX_VERSION, "pages": self.pages}, f, separators=(",", ":"), sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def record(self, source_path, relative_path, title, terms, source_hash=None):
+        self.pages[source_path] = {"path": relative_path, "title": title, "terms": terms, "source_hash": source_hash}
+
+    def is_current(self, source_path, source_hash):
+        # a page edited during builds without the index (which leave it alone) is indexed again
+        page = self.pages.get(source_path)
+        return page is not None and page.get("source_hash") == source_hash
+
+    def pop_missing(self, seen_sources):
+        for source in [source for source in self.pages if source not in seen_sources]:
+            del self.pages[source]
+
+    # out_dir/pages.json = {"version", "prefix_length", "pages": [{"url", "title"}]}, a page's id is its position
+    # out_dir/<prefix>.json = {term: [[page id, position, position, ...], ...]} for every term starting with prefix
+    # files whose content didn't change are left untouched, shards for prefixes that no longer occur are removed
+    def write(self, out_dir, base_path="/"):
+        os.makedirs(out_dir, exist_ok=True)
+        sources = sorted(self.pages)
+        shards = {}
+        for page_id, source in enumerate(sources):
+            for term, positions in self.pages[source]["terms"].items():
+                shards.setdefault(term[:PREFIX_LENGTH], {}).setdefault(term, []).append([page_id, *positions])
+
+        pages = [{"url": page_url(self.pages[source]["path"], base_path), "title": self.pages[source]["title"]} for source in sources]
+        written = {"pages.json"}
+        _write_json(os.path.join(out_dir, "pages.json"), {"version": SEARCH_INDEX_VERSION, "prefix_length": PREFIX_LENGTH, "pages": pages})
+        for prefix, terms in shards.items():
+            name = f"{prefix}.json"
+            written.add(name)
+            _write_json(os.path.join(out_dir, name), terms)
+        for name in os.listdir(out_dir):
+            if name.endswith(".json") and name not in written:
+                os.remove(os.path.join(out_dir, name))
+        return len(shards)
+
+def page_url(relative_path, base_path="/"):
+    # blog/tom/index.html -> {base_path}blog/tom, the form the site's own links use
+    directory, name = os.path.split(relative_path)
+    path = directory if name == "index.html" else relative_path
+    return base_path + path.replace(os.sep, "/")
+
+def _write_json(path, data):
+    with OutputWriter(path, encoding="utf-8") as writer:
+        writer.write(json.dumps(data, separators=(",", ":"), sort_keys=True, ensure_ascii=False))
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import shutil
+
+from buildmanifest import hash_file
+from helperfunctions import collect_pages
+
+SHARD_MANIFEST_VERSION = 1
+# written into every shard's output dir, so it travels with the pages to the merge step
+SHARD_MANIFEST_NAME = ".shard-manifest.json"
+
+
+def parse_shard(text):
+    # "i/N" -> (i, N), shards are numbered from 0
+    index, sep, count = text.partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"Invalid shard '{text}', expected i/N") from None
+    if not sep or count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard '{text}', expected i/N with 0 <= i < N")
+    return index, count
+
+def shard_key(source_path, content_dir):
+    # pages are identified by their path inside the content dir, the same on every machine and OS
+    return os.path.relpath(source_path, content_dir).replace(os.sep, "/")
+
+def shard_of(key, count):
+    # a stable hash (unlike hash(), which is salted per process) so every runner agrees on the split
+    return int.from_bytes(hashlib.sha256(key.encode()).digest()[:8], "big") % count
+
+def in_shard(source_path, content_dir, shard):
+    return shard is None or shard_of(shard_key(source_path, content_dir), shard[1]) == shard[0]
+
+
+# records what one shard built: its pages' outputs and digests, and their search postings when indexed
+def write_shard_manifest(out_dir, shard, base_path, manifest, content_dir, search_index=None):
+    pages = {}
+    for source, entry in manifest.pages.items():
+        if in_shard(source, content_dir, shard):
+            pages[shard_key(source, content_dir)] = {
+                "output": os.path.relpath(entry["dest_path"], out_dir).replace(os.sep, "/"),
+                "output_hash": entry["output_hash"],
+            }
+    search = None
+    if search_index is not None:
+        search = {shard_key(source, content_dir): page for source, page in search_index.pages.items() if in_shard(source, content_dir, shard)}
+    data = {"version": SHARD_MANIFEST_VERSION, "shard": list(shard), "base_path": base_path, "pages": pages, "search": search}
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, SHARD_MANIFEST_NAME), 'w') as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+
+def _load_shard_manifest(shard_dir):
+    path = os.path.join(shard_dir, SHARD_MANIFEST_NAME)
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"{shard_dir} has no readable shard manifest ({e})") from None
+    if data.get("version") != SHARD_MANIFEST_VERSION:
+        raise ValueError(f"{path} was written by an incompatible version")
+    return data
+
+# replaces out_dir with the combined output dirs of every shard, after checking that together they built each page of
+# content_dir exactly once, all for the same base path, and that every page arrived with the digest it was built with
+# return = {"pages": number of pages, "base_path": the shards' base path,
+#           "search": merged search postings by page key, or None if a shard was built without them}
+# raises ValueError describing every problem found, out_dir is left alone in that case
+def merge_shards(shard_dirs, content_dir, out_dir):
+    if any(os.path.abspath(shard_dir) == os.path.abspath(out_dir) for shard_dir in shard_dirs):
+        raise ValueError(f"{out_dir} can't be both a shard and the merge output")
+    manifests = [_load_shard_manifest(shard_dir) for shard_dir in shard_dirs]
+    problems = []
+    counts = {manifest["shard"][1] for manifest in manifests}
+    indexes = sorted(manifest["shard"][0] for manifest in manifests)
+    if len(counts) != 1 or indexes != list(range(next(iter(counts)))):
+        problems.append(f"expected shards 0..N-1 of one split, got {', '.join('/'.join(map(str, m['shard'])) for m in manifests)}")
+    base_paths = {manifest["base_path"] for manifest in manifests}
+    if len(base_paths) != 1:
+        problems.append(f"shards were built for different base paths: {', '.join(sorted(base_paths))}")
+
+    built_by = {}
+    for shard_dir, manifest in zip(shard_dirs, manifests):
+        for key, page in manifest["pages"].items():
+            built_by.setdefault(key, []).append(shard_dir)
+            output = os.path.join(shard_dir, page["output"])
+            if not os.path.isfile(output):
+                problems.append(f"{key}: output {output} is missing")
+            elif hash_file(output) != page["output_hash"]:
+                problems.append(f"{key}: output {output} doesn't match the digest it was built with")
+    expected = {shard_key(source, content_dir) for source, _ in collect_pages(content_dir, out_dir)}
+    for key in sorted(expected - set(built_by)):
+        problems.append(f"{key}: not built by any shard")
+    for key, dirs in sorted(built_by.items()):
+        if len(dirs) > 1:
+            problems.append(f"{key}: built by more than one shard ({', '.join(dirs)})")
+        elif key not in expected:
+            problems.append(f"{key}: built by {dirs[0]} but not in {content_dir}")
+
+    # every file may come from any shard (static files come from shard 0), but two shards must never disagree
+    sources = {}
+    for shard_dir in shard_dirs:
+        for root, _, file_names in os.walk(shard_dir):
+            for file_name in file_names:
+                path = os.path.join(root, file_name)
+                rel_path = os.path.relpath(path, shard_dir)
+                if rel_path == SHARD_MANIFEST_NAME:
+                    continue
+                if rel_path in sources and hash_file(sources[rel_path]) != hash_file(path):
+                    problems.append(f"{rel_path}: differs between {sources[rel_path]} and {path}")
+                sources.setdefault(rel_path, path)
+    if problems:
+        raise ValueError("\n".join(problems))
+
+    if os.path.exists(out_dir):
+        shutil.rmtree(out_dir)
+    for rel_path, path in sources.items():
+        dest = os.path.join(out_dir, rel_path)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        shutil.copy2(path, dest)
+
+    search = None
+    if all(manifest["search"] is not None for manifest in manifests):
+        search = {}
+        for manifest in manifests:
+            search.update(manifest["search"])
+    print(f"Merged {len(shard_dirs)} shards: {len(built_by)} pages, {len(sources)} files")
+    return {"pages": len(built_by), "base_path": manifests[0]["base_path"], "search": search}
@@ -0,0 +1,142 @@
+import hashlib
+import os
+import re
+
+from nodes.textnode import apply_base_path
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(>?)\s*([\w.-]+)\s*\}\}")
+# group 2 runs to the closing quote, or to the end of the literal when a placeholder follows inside the attribute
+ROOT_RELATIVE_ATTRIBUTE_PATTERN = re.compile(r"""((?:href|src)=["'])(/(?!/)[^"'\s]*)""")
+LAYOUTS_DIR = "layouts"
+PARTIALS_DIR = "partials"
+
+
+class CompiledTemplate:
+    def __init__(self, path, literals, slots, dependencies, digest, urls=()):
+        # literals always has exactly one more element than slots, the page is
+        # literals[0] + slot[0] + literals[1] + ... + literals[-1]
+        self.path = path
+        self.literals = literals
+        self.slots = slots  # list of (name, original placeholder text)
+        self.dependencies = dependencies  # template path followed by every partial it pulls in
+        self.hash = digest
+        self.urls = urls  # root-relative href/src urls as written in the template, before any rewriting
+
+    def render(self, values):
+        parts = [self.literals[0]]
+        for (name, raw), literal in zip(self.slots, self.literals[1:]):
+            value = values.get(name)
+            # placeholders the page doesn't fill are left as written, like the old str.replace chain did
+            parts.append(raw if value is None else value)
+            parts.append(literal)
+        return "".join(parts)
+
+    # streaming counterpart of render: values can be strings or anything with a render_to method (HTMLNode trees)
+    def render_to(self, writer, values):
+        write = writer.append if isinstance(writer, list) else writer.write
+        write(self.literals[0])
+        for (name, raw), literal in zip(self.slots, self.literals[1:]):
+            value = values.get(name)
+            if value is None:
+                write(raw)
+            elif isinstance(value, str):
+                write(value)
+            else:
+                value.render_to(writer)
+            write(literal)
+
+
+def _read_template(path):
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"The template file '{path}' does not exist.")
+    with open(path, 'r') as f:
+        return f.read()
+
+
+def _expand_partials(text, partials_dir, dependencies, stack):
+    def include(match):
+        if not match.group(1):
+            return match.group(0)
+        partial_path = os.path.join(partials_dir, f"{match.group(2)}.html")
+        if partial_path in stack:
+            raise ValueError(f"Partial '{partial_path}' includes itself.")
+        if partial_path not in dependencies:
+            dependencies.append(partial_path)
+        return _expand_partials(_read_template(partial_path), partials_dir, dependencies, stack + [partial_path])
+    return PLACEHOLDER_PATTERN.sub(include, text)
+
+
+# base_path = prefix applied once, at compile time, to root-relative href/src attributes in the template markup
+# assets = optional assetmap.AssetMap, references to static files point at their fingerprinted copies
+def compile_template(path, base_path="/", assets=None):
+    partials_dir = os.path.join(os.path.dirname(path), PARTIALS_DIR)
+    dependencies = [path]
+    text = _expand_partials(_read_template(path), partials_dir, dependencies, [path])
+
+    literals = []
+    slots = []
+    last_pos = 0
+    for match in PLACEHOLDER_PATTERN.finditer(text):
+        literals.append(text[last_pos:match.start()])
+        slots.append((match.group(2), match.group(0)))
+        last_pos = match.end()
+    literals.append(text[last_pos:])
+    urls = sorted({match.group(2) for literal in literals for match in ROOT_RELATIVE_ATTRIBUTE_PATTERN.finditer(literal)})
+    if base_path != "/" or assets is not None:
+        rewrite = lambda m: m.group(1) + apply_base_path(m.group(2), base_path, assets)
+        literals = [ROOT_RELATIVE_ATTRIBUTE_PATTERN.sub(rewrite, literal) for literal in literals]
+
+    return CompiledTemplate(path, literals, slots, dependencies, _hash_files(dependencies), urls)
+
+
+def _hash_files(paths):
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class TemplateCache:
+    def __init__(self):
+        self._templates = {}  # (path, base_path, asset map digest) -> (stat signature of all dependencies, CompiledTemplate)
+
+    def _signature(self, paths):
+        signature = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                return None
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def get(self, path, base_path="/", assets=None):
+        key = (path, base_path, None if assets is None else assets.digest)
+        cached = self._templates.get(key)
+        if cached is not None:
+            signature, compiled = cached
+            current = self._signature(compiled.dependencies)
+            if current == signature:
+                return compiled
+            # touched but byte-identical files keep the compiled template
+            if current is not None and _hash_files(compiled.dependencies) == compiled.hash:
+                self._templates[key] = (current, compiled)
+                return compiled
+        compiled = compile_template(path, base_path, assets)
+        self._templates[key] = (self._signature(compiled.dependencies), compiled)
+        return compiled
+
+
+_cache = TemplateCache()
+
+
+def load_template(path, base_path="/", assets=None):
+    return _cache.get(path, base_path, assets)
+
+
+def resolve_layout(template_path, layout=None):
+    # pages pick a layout by name, which lives in layouts/ next to the default template
+    if not layout:
+        return template_path
+    return os.path.join(os.path.dirname(template_path), LAYOUTS_DIR, f"{layout}.html")
@@ -0,0 +1,44 @@
+import os
+import unittest
+
+from assetmap import AssetMap, fingerprinted_path, should_fingerprint
+
+class TestAssetMap(unittest.TestCase):
+
+    def test_fingerprinted_path(self):
+        self.assertEqual(fingerprinted_path(os.path.join("images", "tom.png"), "0123456789abcdef"), os.path.join("images", "tom.0123456789.png"))
+        self.assertEqual(fingerprinted_path("LICENSE", "0123456789abcdef"), "LICENSE.0123456789")
+        self.assertTrue(should_fingerprint("index.css"))
+        self.assertTrue(should_fingerprint(os.path.join("images", "Tom.PNG")))
+        self.assertTrue(should_fingerprint(os.path.join("fonts", "body.woff2")))
+        for rel_path in ("404.html", "robots.txt", "favicon.ico", "CNAME", os.path.join("files", "a.txt")):
+            self.assertFalse(should_fingerprint(rel_path), rel_path)
+
+    def test_from_synced_maps_only_renamed_files(self):
+        assets = AssetMap.from_synced({
+            "index.css": {"output": "index.abc.css"},
+            os.path.join("images", "a.png"): {"output": os.path.join("images", "a.def.png")},
+            "404.html": {},
+        })
+        self.assertEqual(assets.urls, {"/index.css": "/index.abc.css", "/images/a.png": "/images/a.def.png"})
+        self.assertIsNone(assets.images)
+
+    def test_from_synced_with_images(self):
+        synced = {os.path.join("images", "a.png"): {"dimensions": [3, 2]}, os.path.join("images", "b.png"): {"output": os.path.join("images", "a.png"), "dimensions": [3, 2]}}
+        assets = AssetMap.from_synced(synced, images=True)
+        self.assertEqual(assets.urls, {"/images/b.png": "/images/a.png"})
+        self.assertEqual(assets.images, {"/images/a.png": (3, 2), "/images/b.png": (3, 2)})
+        self.assertNotEqual(assets.digest, AssetMap(assets.urls).digest)
+
+    def test_rewrite_keeps_query_and_fragment(self):
+        assets = AssetMap({"/index.css": "/index.abc.css"})
+        self.assertEqual(assets.rewrite("/index.css"), "/index.abc.css")
+        self.assertEqual(assets.rewrite("/index.css?v=1#top"), "/index.abc.css?v=1#top")
+        self.assertEqual(assets.rewrite("/other.css"), "/other.css")
+
+    def test_digest_follows_mapping(self):
+        self.assertEqual(AssetMap({"/a": "/a.1"}).digest, AssetMap({"/a": "/a.1"}).digest)
+        self.assertNotEqual(AssetMap({"/a": "/a.1"}).digest, AssetMap({"/a": "/a.2"}).digest)
+
+if __name__ == "__main__":
+    unittest.main()
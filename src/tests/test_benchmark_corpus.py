@@ -0,0 +1,28 @@
+import os
+import tempfile
+import unittest
+
+from benchmarks.corpus import PROFILES, generate_content_tree, generate_document
+from markdownparser import markdown_to_html_node
+
+class TestBenchmarkCorpus(unittest.TestCase):
+
+    def test_documents_are_deterministic(self):
+        for kind in PROFILES:
+            self.assertEqual(generate_document(kind, seed=3), generate_document(kind, seed=3))
+        self.assertNotEqual(generate_document("small", seed=1), generate_document("small", seed=2))
+
+    def test_documents_parse(self):
+        for kind in ("small", "inline_heavy", "long_lists", "large_code"):
+            html = markdown_to_html_node(generate_document(kind)).to_html()
+            self.assertTrue(html.startswith("<div><h1>"))
+
+    def test_content_tree(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            generate_content_tree(tmp, 7, pages_per_dir=2)
+            pages = [name for _, _, names in os.walk(tmp) for name in names]
+            self.assertEqual(len(pages), 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import itertools
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from blockcache import BlockCache
+from buildstats import PageStats
+from markdownparser import BlockType, markdown_to_html_node
+
+class TestBlockCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache", "blocks.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_key_depends_on_every_input(self):
+        key = BlockCache.key(1, "/", BlockType.PARAGRAPH, ["a", "b"])
+        self.assertEqual(key, BlockCache.key(1, "/", BlockType.PARAGRAPH, ["a", "b"]))
+        self.assertNotEqual(key, BlockCache.key(2, "/", BlockType.PARAGRAPH, ["a", "b"]))
+        self.assertNotEqual(key, BlockCache.key(1, "/site/", BlockType.PARAGRAPH, ["a", "b"]))
+        self.assertNotEqual(key, BlockCache.key(1, "/", BlockType.PARAGRAPH, ["a b"]))
+
+    def test_entries_persist_across_instances(self):
+        cache = BlockCache(self.path)
+        self.assertIsNone(cache.get("k"))
+        cache.put("k", "<p>x</p>")
+        cache.close()
+        cache = BlockCache(self.path)
+        self.assertEqual(cache.get("k"), "<p>x</p>")
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+        cache.close()
+
+    def test_evict_least_recently_used(self):
+        cache = BlockCache(self.path, max_bytes=10)
+        cache.put("old", "12345")
+        cache.flush()
+        cache.put("new", "12345")
+        cache.flush()
+        cache.get("old")
+        cache.put("newest", "12345")
+        self.assertEqual(cache.evict(), 1)
+        self.assertIsNone(cache.get("new"))
+        self.assertIsNotNone(cache.get("old"))
+        self.assertIsNotNone(cache.get("newest"))
+        cache.close()
+
+    def test_cached_parse_matches_uncached(self):
+        markdown = "# Title\n\n[home](/) and **bold**\n\n- a\n- b\n\n```\ncode\n```"
+        expected = markdown_to_html_node(markdown, "/site/").to_html()
+        cache = BlockCache(self.path)
+        self.assertEqual(markdown_to_html_node(markdown, "/site/", block_cache=cache).to_html(), expected)
+        self.assertEqual((cache.hits, cache.misses), (0, 4))
+        stats = PageStats("page.md")
+        self.assertEqual(markdown_to_html_node(markdown, "/site/", stats, cache).to_html(), expected)
+        self.assertEqual((stats.cache_hits, stats.cache_misses), (4, 0))
+        self.assertNotEqual(markdown_to_html_node(markdown, "/", block_cache=cache).to_html(), expected)
+        cache.close()
+
+    def test_cache_lookup_is_timed_separately_from_block_split(self):
+        cache = BlockCache(self.path)
+        stats = PageStats("page.md")
+        # every clock reading is one tick later, so each timed interval adds exactly 1
+        with mock.patch("markdownparser.time.perf_counter", side_effect=itertools.count()):
+            markdown_to_html_node("# Title\n\ntext", "/", stats, cache)
+        self.assertEqual(stats.times["block_cache"], 2)
+        self.assertEqual(stats.times["block_split"], 3)
+        cache.close()
+
+    def test_cached_blocks_still_feed_text_sink(self):
+        markdown = "# Title\n\n**_nested_** [home](/)\n\n- a\n- b"
+        expected = []
+        markdown_to_html_node(markdown, text_sink=expected)
+        self.assertEqual(expected, ["Title", "nested home", "<li>a</li><li>b</li>"])
+        cache = BlockCache(self.path)
+        # html cached without text (built with search off) gets parsed again once
+        markdown_to_html_node(markdown, block_cache=cache)
+        for stats in (None, PageStats("page.md"), None):
+            text = []
+            markdown_to_html_node(markdown, "/", stats, cache, text)
+            self.assertEqual(text, expected)
+        cache.close()
+
+
+    def test_counters_count_blocks_with_text_sink(self):
+        markdown = "# Title\n\ntext\n\n- a\n- b"
+        cache = BlockCache(self.path)
+        markdown_to_html_node(markdown, block_cache=cache, text_sink=[])
+        self.assertEqual((cache.hits, cache.misses), (0, 3))
+        markdown_to_html_node(markdown, block_cache=cache, text_sink=[])
+        self.assertEqual((cache.hits, cache.misses), (3, 3))
+        cache.close()
+
+        # html cached by a build without search still has to be parsed for its text: a miss, counted once
+        cache = BlockCache(os.path.join(self.tmp.name, "plain.sqlite3"))
+        markdown_to_html_node(markdown, block_cache=cache)
+        stats = PageStats("page.md")
+        markdown_to_html_node(markdown, "/", stats, cache, [])
+        self.assertEqual((cache.hits, cache.misses), (0, 6))
+        self.assertEqual((stats.cache_hits, stats.cache_misses), (0, 3))
+        markdown_to_html_node(markdown, block_cache=cache, text_sink=[])
+        self.assertEqual((cache.hits, cache.misses), (3, 6))
+        cache.close()
+
+if __name__ == "__main__":
+    unittest.main()
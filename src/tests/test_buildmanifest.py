@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+
+from buildmanifest import BuildManifest, hash_file
+
+class TestBuildManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache", "manifest.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_load_missing_manifest_is_empty(self):
+        manifest = BuildManifest.load(self.path)
+        self.assertEqual(manifest.pages, {})
+
+    def test_load_corrupt_manifest_is_empty(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, 'w') as f:
+            f.write("{not json")
+        self.assertEqual(BuildManifest.load(self.path).pages, {})
+
+    def test_save_and_load_roundtrip(self):
+        manifest = BuildManifest()
+        manifest.record("content/index.md", {"source_hash": "abc", "template_hash": "def", "base_path": "/", "dest_path": "docs/index.html"})
+        manifest.save(self.path)
+        self.assertEqual(BuildManifest.load(self.path).pages, manifest.pages)
+
+    def test_rebuild_requires_output(self):
+        dest_path = os.path.join(self.tmp.name, "index.html")
+        entry = {"source_hash": "abc", "template_hash": "def", "base_path": "/", "dest_path": dest_path}
+        manifest = BuildManifest()
+        manifest.record("content/index.md", entry)
+        self.assertEqual(manifest.rebuild_reasons("content/index.md", entry), ["output missing"])
+        open(dest_path, 'w').close()
+        self.assertEqual(manifest.rebuild_reasons("content/index.md", entry), [])
+        self.assertEqual(manifest.rebuild_reasons("content/index.md", dict(entry, base_path="/sub/")), ["base_path changed"])
+
+    def test_rebuild_reasons(self):
+        dest_path = os.path.join(self.tmp.name, "index.html")
+        open(dest_path, 'w').close()
+        entry = {"dest_path": dest_path, "base_path": "/", "deps": {"index.md": "1", "template.html": "2", "static/a.png": "3"}}
+        manifest = BuildManifest()
+        self.assertEqual(manifest.rebuild_reasons("index.md", entry), ["new page"])
+        manifest.record("index.md", entry)
+        self.assertEqual(manifest.rebuild_reasons("index.md", entry), [])
+        changed = dict(entry, deps={"index.md": "1", "template.html": "9", "static/b.png": "4"})
+        self.assertEqual(manifest.rebuild_reasons("index.md", changed), [
+            "template.html changed",
+            "new dependency static/b.png",
+            "no longer depends on static/a.png",
+        ])
+
+    def test_pop_missing(self):
+        manifest = BuildManifest()
+        manifest.record("a.md", {"dest_path": "a.html"})
+        manifest.record("b.md", {"dest_path": "b.html"})
+        self.assertEqual(manifest.pop_missing({"a.md"}), [{"dest_path": "b.html"}])
+        self.assertEqual(list(manifest.pages), ["a.md"])
+
+    def test_hash_file(self):
+        path = os.path.join(self.tmp.name, "file.md")
+        with open(path, 'w') as f:
+            f.write("# Title")
+        self.assertEqual(hash_file(path), hash_file(path))
+        with open(path, 'w') as f:
+            f.write("# Other title")
+        self.assertNotEqual(hash_file(path), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from buildstats import STAGES, BuildStats, PageStats
+from markdownparser import markdown_to_html_node
+
+class TestBuildStats(unittest.TestCase):
+
+    def make_page(self, path, seconds):
+        page = PageStats(path)
+        page.add("read", seconds)
+        page.add("write", seconds)
+        page.bytes_read = 10
+        page.nodes = 3
+        return page
+
+    def test_page_total(self):
+        page = self.make_page("a.md", 0.5)
+        self.assertEqual(page.total, 1.0)
+        self.assertEqual(set(page.times), set(STAGES))
+
+    def test_totals_and_slowest(self):
+        stats = BuildStats()
+        for path, seconds in (("a.md", 0.1), ("b.md", 0.3), ("c.md", 0.2)):
+            stats.add_page(self.make_page(path, seconds))
+        stats.finish()
+        report = stats.to_dict(slowest=2)
+        self.assertEqual(report["pages"], 3)
+        self.assertEqual(report["nodes"], 9)
+        self.assertEqual(report["bytes_read"], 30)
+        self.assertAlmostEqual(report["stages"]["read"], 0.6)
+        self.assertEqual([page["path"] for page in report["slowest"]], ["b.md", "c.md"])
+
+    def test_write_json_and_summary(self):
+        stats = BuildStats()
+        stats.add_page(self.make_page("a.md", 0.1))
+        stats.finish()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "stats.json")
+            stats.write_json(path)
+            with open(path) as f:
+                self.assertEqual(json.load(f)["pages"], 1)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            stats.print_summary()
+        self.assertIn("a.md", output.getvalue())
+
+    def test_timed_parse_matches_untimed(self):
+        markdown = "# Title\n\nSome **bold** text\n\n- a\n- b"
+        page = PageStats("page.md")
+        self.assertEqual(markdown_to_html_node(markdown, stats=page).to_html(), markdown_to_html_node(markdown).to_html())
+        self.assertEqual(page.nodes, 9)
+        self.assertGreater(page.times["inline_parse"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,19 @@
+import io
+import os
+import random
+import tempfile
+import tracemalloc
 import unittest
+from contextlib import redirect_stdout
+from unittest import mock
 
-from helperfunctions import extract_title
+import helperfunctions
+from assetmap import AssetMap
+from blockcache import BlockCache
+from buildmanifest import BuildManifest
+from buildstats import BuildStats
+from searchindex import SearchIndex
+from helperfunctions import extract_title, generate_page, generate_page_recursive, split_front_matter, sync_dir_to_dir
 
 class TestHelperFunctions(unittest.TestCase):
 
@@ -36,6 +49,400 @@ class TestHelperFunctions(unittest.TestCase):
         with self.assertRaises(ValueError):
             extract_title("#")
 
+    def test_split_front_matter(self):
+        meta, body = split_front_matter("---\nlayout: post\n---\n# Title")
+        self.assertEqual(meta, {"layout": "post"})
+        self.assertEqual(body, "# Title")
+
+    def test_split_front_matter_absent(self):
+        self.assertEqual(split_front_matter("# Title\n---\n"), ({}, "# Title\n---\n"))
+        self.assertEqual(split_front_matter("---\nnever closed"), ({}, "---\nnever closed"))
+
+
+class TestIncrementalBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\nHello")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def build(self, manifest, **kwargs):
+        with mock.patch.object(helperfunctions, "generate_page", wraps=helperfunctions.generate_page) as generate_page:
+            generate_page_recursive(self.content, self.template, self.dest, "/", manifest, **kwargs)
+        return sorted(call.kwargs["from_path"] for call in generate_page.call_args_list)
+
+    def test_unchanged_pages_are_skipped(self):
+        manifest = BuildManifest()
+        self.assertEqual(len(self.build(manifest)), 2)
+        self.assertEqual(self.build(manifest), [])
+
+    def test_only_edited_page_is_rebuilt(self):
+        manifest = BuildManifest()
+        self.build(manifest)
+        post = os.path.join(self.content, "blog", "post.md")
+        self.write(post, "# Post\n\nHello again")
+        self.assertEqual(self.build(manifest), [post])
+
+    def test_template_change_rebuilds_everything(self):
+        manifest = BuildManifest()
+        self.build(manifest)
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(len(self.build(manifest)), 2)
+
+    def test_parallel_build_matches_serial_build(self):
+        generate_page_recursive(self.content, self.template, self.dest, "/")
+        serial_dest = self.dest
+        self.dest = os.path.join(self.tmp.name, "docs_parallel")
+        generate_page_recursive(self.content, self.template, self.dest, "/", BuildManifest(), workers=2)
+        for rel_path in ("index.html", os.path.join("blog", "post.html")):
+            with open(os.path.join(serial_dest, rel_path)) as serial, open(os.path.join(self.dest, rel_path)) as parallel:
+                self.assertEqual(serial.read(), parallel.read())
+
+    def test_page_layout_from_front_matter(self):
+        os.makedirs(os.path.join(self.tmp.name, "layouts"))
+        self.write(os.path.join(self.tmp.name, "layouts", "post.html"), "<main>{{ Content }}</main>")
+        manifest = BuildManifest()
+        self.build(manifest)
+        post = os.path.join(self.content, "blog", "post.md")
+        self.write(post, "---\nlayout: post\n---\n# Post\n\nHello")
+        self.assertEqual(self.build(manifest), [post])
+        with open(os.path.join(self.dest, "blog", "post.html")) as f:
+            self.assertEqual(f.read(), "<main><div><h1>Post</h1><p>Hello</p></div></main>")
+        self.write(os.path.join(self.tmp.name, "layouts", "post.html"), "<section>{{ Content }}</section>")
+        self.assertEqual(self.build(manifest), [post])
+
+    def test_stats_build_matches_plain_build(self):
+        generate_page_recursive(self.content, self.template, self.dest, "/sub/")
+        plain_dest = self.dest
+        self.dest = os.path.join(self.tmp.name, "docs_stats")
+        stats = BuildStats()
+        generate_page_recursive(self.content, self.template, self.dest, "/sub/", stats=stats)
+        self.assertEqual(sorted(page.path for page in stats.pages), sorted([
+            os.path.join(self.content, "index.md"), os.path.join(self.content, "blog", "post.md"),
+        ]))
+        for rel_path in ("index.html", os.path.join("blog", "post.html")):
+            with open(os.path.join(plain_dest, rel_path)) as plain, open(os.path.join(self.dest, rel_path)) as timed:
+                self.assertEqual(plain.read(), timed.read())
+
+    def test_stats_build_reports_block_cache_once(self):
+        stats = BuildStats()
+        out = io.StringIO()
+        with redirect_stdout(out):
+            generate_page_recursive(self.content, self.template, self.dest, "/", stats=stats, block_cache_path=os.path.join(self.tmp.name, "blocks.sqlite3"))
+            stats.finish()
+            stats.print_summary()
+        self.assertEqual(out.getvalue().count("Block cache:"), 1)
+        self.assertIn("Block cache: 0 hits, 4 misses", out.getvalue())
+
+    def test_only_pages_referencing_changed_asset_are_rebuilt(self):
+        static = os.path.join(self.tmp.name, "static")
+        os.makedirs(os.path.join(static, "images"))
+        image = os.path.join(static, "images", "a.png")
+        self.write(image, "png")
+        post = os.path.join(self.content, "blog", "post.md")
+        self.write(post, "# Post\n\n![a](/images/a.png)")
+        manifest = BuildManifest()
+        self.build(manifest, static_dir=static)
+        self.assertIn(image, manifest.pages[post]["deps"])
+        self.assertNotIn(image, manifest.pages[os.path.join(self.content, "index.md")]["deps"])
+        self.write(image, "png, but different")
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(self.build(manifest, static_dir=static, explain=True), [post])
+        self.assertIn(f"Rebuilding {post}: {image} changed", output.getvalue())
+
+    def test_search_index_follows_rebuilds(self):
+        manifest = BuildManifest()
+        search_index = SearchIndex()
+        post = os.path.join(self.content, "blog", "post.md")
+        self.build(manifest, search_index=search_index)
+        self.assertEqual(search_index.pages[post]["terms"], {"post": [0], "hello": [1]})
+        self.write(post, "# Post\n\nGoodbye")
+        self.assertEqual(self.build(manifest, search_index=search_index), [post])
+        self.assertEqual(search_index.pages[post]["terms"], {"post": [0], "goodbye": [1]})
+        self.assertEqual(search_index.pages[os.path.join(self.content, "index.md")]["title"], "Home")
+        # pages missing from the index are rebuilt even though their output is current
+        del search_index.pages[post]
+        self.assertEqual(self.build(manifest, search_index=search_index), [post])
+        os.remove(post)
+        self.build(manifest, search_index=search_index)
+        self.assertNotIn(post, search_index.pages)
+
+    def test_search_index_catches_up_with_builds_without_it(self):
+        manifest = BuildManifest()
+        search_index = SearchIndex()
+        post = os.path.join(self.content, "blog", "post.md")
+        self.build(manifest, search_index=search_index)
+        self.write(post, "# Post\n\nGoodbye")
+        self.assertEqual(self.build(manifest), [post])
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(self.build(manifest, search_index=search_index, explain=True), [post])
+        self.assertIn(f"Rebuilding {post}: search index out of date", output.getvalue())
+        self.assertEqual(search_index.pages[post]["terms"], {"post": [0], "goodbye": [1]})
+
+    def test_fingerprinting_makes_template_assets_dependencies(self):
+        static = os.path.join(self.tmp.name, "static")
+        os.makedirs(static)
+        css = os.path.join(static, "index.css")
+        self.write(css, "body {}")
+        self.write(self.template, '<link href="/index.css"><title>{{ Title }}</title>{{ Content }}')
+        manifest = BuildManifest()
+        assets = AssetMap({"/index.css": "/index.0123456789.css"})
+        self.build(manifest, static_dir=static, assets=assets)
+        with open(os.path.join(self.dest, "index.html")) as f:
+            self.assertIn('<link href="/index.0123456789.css">', f.read())
+        self.assertTrue(all(css in entry["deps"] for entry in manifest.pages.values()))
+        self.write(css, "body { color: red }")
+        self.assertEqual(len(self.build(manifest, static_dir=static, assets=AssetMap({"/index.css": "/index.abcdef0123.css"}))), 2)
+
+    def test_fingerprinting_makes_linked_assets_dependencies(self):
+        static = os.path.join(self.tmp.name, "static")
+        os.makedirs(os.path.join(static, "files"))
+        linked = os.path.join(static, "files", "a.txt")
+        self.write(linked, "a")
+        post = os.path.join(self.content, "blog", "post.md")
+        self.write(post, "# Post\n\n[the file](/files/a.txt) and [home](/)")
+        manifest = BuildManifest()
+        self.build(manifest, static_dir=static, assets=AssetMap({"/files/a.txt": "/files/a.0123456789.txt"}))
+        self.assertIn(linked, manifest.pages[post]["deps"])
+        self.assertEqual(set(manifest.pages[post]["deps"]), {post, self.template, linked})
+        self.write(linked, "b")
+        self.assertIn(post, self.build(manifest, static_dir=static, assets=AssetMap({"/files/a.txt": "/files/a.abcdef0123.txt"})))
+        with open(os.path.join(self.dest, "blog", "post.html")) as f:
+            self.assertIn('href="/files/a.abcdef0123.txt"', f.read())
+
+    def test_asset_map_change_rebuilds_every_page(self):
+        manifest = BuildManifest()
+        self.build(manifest)
+        self.assertEqual(len(self.build(manifest, assets=AssetMap(images={}))), 2)
+        self.assertEqual(self.build(manifest, assets=AssetMap(images={})), [])
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(len(self.build(manifest, explain=True)), 2)
+        self.assertIn("asset_map changed", output.getvalue())
+
+    def test_deleted_source_removes_output(self):
+        manifest = BuildManifest()
+        self.build(manifest)
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        self.build(manifest)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+
+
+class TestStreamedPage(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.source = os.path.join(self.tmp.name, "page.md")
+        with open(self.template, 'w') as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def render(self, markdown, stream_threshold):
+        with open(self.source, 'w') as f:
+            f.write(markdown)
+        dest = os.path.join(self.tmp.name, "docs", f"{stream_threshold}.html")
+        with redirect_stdout(io.StringIO()):
+            generate_page(self.source, self.template, dest, "/site/", stream_threshold=stream_threshold)
+        with open(dest) as f:
+            return f.read()
+
+    def test_streamed_output_matches_buffered_output(self):
+        markdown = "---\nauthor: me\n---\nIntro\n\n# The Title\n\n[home](/)  \n\n* a\n* b\n\n```\nx = 1\n```"
+        self.assertEqual(self.render(markdown, 1), self.render(markdown, None))
+        self.assertIn("<title>The Title</title>", self.render(markdown, 1))
+
+    def test_small_sources_are_not_streamed(self):
+        with mock.patch.object(helperfunctions, "_generate_page_streamed") as streamed:
+            self.render("# Small", 1024)
+        streamed.assert_not_called()
+
+    def test_streamed_page_with_block_cache_and_search_stays_small(self):
+        # distinct blocks of one-letter words: every block misses the cache and none of them has a posting,
+        # so whatever is left on the heap is html or text held back from the stream
+        rng = random.Random(0)
+        with open(self.source, 'w') as f:
+            f.write("# Big\n\n")
+            for _ in range(4000):
+                f.write(" ".join(rng.choice("abcdefghij") for _ in range(120)) + "\n\n")
+        block_cache = BlockCache(os.path.join(self.tmp.name, "blocks.sqlite3"))
+        tracemalloc.start()
+        try:
+            with redirect_stdout(io.StringIO()):
+                result = generate_page(self.source, self.template, os.path.join(self.tmp.name, "big.html"), "/", block_cache=block_cache, stream_threshold=1, search=True)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        block_cache.close()
+        # about 1 MB of source: holding every block's html (or the page's text) until the end takes several MB,
+        # a flush batch of cached html is what's left
+        self.assertLess(peak, 1024 * 1024)
+        self.assertEqual(result["search"]["terms"], {"big": [0]})
+        self.assertEqual(block_cache.misses, 4001)
+
+    def test_missing_title_raises(self):
+        with self.assertRaises(ValueError):
+            self.render("no title here\n\n## not h1", 1)
+
+
+class TestContentDiscovery(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        for path in ["index.md", "notes.txt", "blog/a/index.md", "blog/a/b/deep.md", "blog/index.md", "about.md"]:
+            path = os.path.join(self.content, path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write("# Title")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def listdir_pages(self, content, dest):
+        # the recursive os.listdir walk iter_pages replaced
+        pages = []
+        for item in os.listdir(content):
+            item_path = os.path.join(content, item)
+            if os.path.isdir(item_path):
+                pages.extend(self.listdir_pages(item_path, os.path.join(dest, item)))
+            elif item.endswith('.md'):
+                pages.append((item_path, os.path.join(dest, item.replace('.md', '.html'))))
+        return pages
+
+    def test_iter_pages_matches_recursive_listdir(self):
+        pages = list(helperfunctions.iter_pages(self.content, "docs"))
+        self.assertEqual(pages, self.listdir_pages(self.content, "docs"))
+        self.assertIn((os.path.join(self.content, "blog", "a", "b", "deep.md"), os.path.join("docs", "blog", "a", "b", "deep.html")), pages)
+        self.assertEqual(len(pages), 5)
+
+    def test_missing_content_dir_has_no_pages(self):
+        self.assertEqual(helperfunctions.collect_pages(os.path.join(self.tmp.name, "missing"), "docs"), [])
+
+    def test_ensure_dir_creates_each_directory_once(self):
+        path = os.path.join(self.tmp.name, "blog")
+        helperfunctions.forget_dirs()
+        with mock.patch.object(helperfunctions.os, "makedirs", wraps=os.makedirs) as makedirs:
+            helperfunctions.ensure_dir(path)
+            helperfunctions.ensure_dir(path)
+        self.assertEqual(makedirs.call_count, 1)
+        self.assertTrue(os.path.isdir(path))
+
+    def test_removed_directories_are_created_again(self):
+        dest_root = os.path.join(self.tmp.name, "docs")
+        page = os.path.join(dest_root, "blog", "index.html")
+        helperfunctions.forget_dirs()
+        helperfunctions.ensure_dir(os.path.dirname(page))
+        with open(page, 'w') as f:
+            f.write("x")
+        helperfunctions.remove_output(page, dest_root)
+        self.assertFalse(os.path.exists(os.path.dirname(page)))
+        helperfunctions.ensure_dir(os.path.dirname(page))
+        self.assertTrue(os.path.isdir(os.path.dirname(page)))
+
+
+class TestSyncDirToDir(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png-bytes")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def sync(self, previous=None, use_hash=False, fingerprint=False, images=False):
+        with mock.patch.object(helperfunctions.shutil, "copy2", wraps=helperfunctions.shutil.copy2) as copy2:
+            synced = sync_dir_to_dir(self.static, self.dest, previous, use_hash, fingerprint, images)
+        return synced, sorted(os.path.relpath(call.args[0], self.static) for call in copy2.call_args_list)
+
+    def test_only_changed_files_are_copied(self):
+        synced, copied = self.sync()
+        self.assertEqual(copied, ["images/a.png", "index.css"])
+        synced, copied = self.sync(synced)
+        self.assertEqual(copied, [])
+        self.write(os.path.join(self.static, "index.css"), "body { color: red }")
+        synced, copied = self.sync(synced)
+        self.assertEqual(copied, ["index.css"])
+
+    def test_orphans_removed_and_generated_pages_kept(self):
+        synced, _ = self.sync()
+        self.write(os.path.join(self.dest, "index.html"), "<p>generated</p>")
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        synced, _ = self.sync(synced)
+        self.assertEqual(sorted(synced), ["index.css"])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+
+    def test_checksum_skips_identical_content_with_new_mtime(self):
+        synced, _ = self.sync(use_hash=True)
+        css = os.path.join(self.static, "index.css")
+        os.utime(css, ns=(0, 0))
+        synced, copied = self.sync(synced, use_hash=True)
+        self.assertEqual(copied, [])
+        self.assertEqual(os.stat(os.path.join(self.dest, "index.css")).st_mtime_ns, 0)
+
+    def test_fingerprinted_copies(self):
+        synced, _ = self.sync(fingerprint=True)
+        css = synced["index.css"]["output"]
+        self.assertRegex(css, r"^index\.[0-9a-f]{10}\.css$")
+        self.assertEqual(sorted(os.listdir(self.dest)), ["images", css])
+        # unchanged files keep their recorded hash instead of being read again
+        with mock.patch.object(helperfunctions, "hash_file") as hash_file:
+            synced, copied = self.sync(synced, fingerprint=True)
+        hash_file.assert_not_called()
+        self.assertEqual(copied, [])
+        self.write(os.path.join(self.static, "index.css"), "body { color: red }")
+        synced, copied = self.sync(synced, fingerprint=True)
+        self.assertEqual(copied, ["index.css"])
+        self.assertNotEqual(synced["index.css"]["output"], css)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, css)))
+
+    def test_image_sizes_and_duplicates(self):
+        gif = b"GIF89a" + (3).to_bytes(2, "little") + (2).to_bytes(2, "little") + b"\x00" * 20
+        for name in ("a.gif", "b.gif"):
+            with open(os.path.join(self.static, "images", name), 'wb') as f:
+                f.write(gif)
+        synced, copied = self.sync(images=True)
+        self.assertEqual(synced["images/a.gif"]["dimensions"], [3, 2])
+        self.assertIsNone(synced["images/a.png"]["dimensions"])
+        self.assertEqual(synced["images/b.gif"]["duplicate_of"], "images/a.gif")
+        self.assertNotIn("images/b.gif", copied)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.dest, "images"))), ["a.gif", "a.png"])
+        # sizes are reused while the hash matches
+        with mock.patch.object(helperfunctions, "image_size") as image_size:
+            synced, copied = self.sync(synced, images=True)
+        image_size.assert_not_called()
+        self.assertEqual(copied, [])
+
+    def test_missing_source_dir(self):
+        with self.assertRaises(FileNotFoundError):
+            sync_dir_to_dir(os.path.join(self.tmp.name, "nope"), self.dest)
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -1,6 +1,8 @@
 import unittest
 
 from nodes.htmlnode import HTMLNode
+from nodes.leafnode import LeafNode
+from nodes.parentnode import ParentNode
 
 class TestHTMLNode(unittest.TestCase):
     def test_to_html(self):
@@ -24,6 +26,9 @@ class TestHTMLNode(unittest.TestCase):
         node = HTMLNode(value = 25)
         expected_string = "HTMLNode(None, 25, None, None)"
         self.assertEqual(str(node), expected_string)
+    def test_no_instance_dict(self):
+        for node in (HTMLNode(), LeafNode("value"), ParentNode("p", [])):
+            self.assertFalse(hasattr(node, "__dict__"))
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,57 @@
+import os
+import struct
+import tempfile
+import unittest
+
+from imageinfo import image_size, is_image_path
+
+class TestImageInfo(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def size_of(self, data, name="image"):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return image_size(path)
+
+    def test_png(self):
+        data = b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">II", 640, 480) + b"\x08\x06\x00\x00\x00"
+        self.assertEqual(self.size_of(data), (640, 480))
+
+    def test_gif(self):
+        self.assertEqual(self.size_of(b"GIF89a" + struct.pack("<HH", 32, 16) + b"\x00" * 20), (32, 16))
+
+    def test_webp(self):
+        riff = lambda chunk: b"RIFF" + struct.pack("<I", 100) + b"WEBP" + chunk + b"\x00" * 8
+        lossy = b"VP8 " + struct.pack("<I", 50) + b"\x00\x00\x00" + b"\x9d\x01\x2a" + struct.pack("<HH", 300, 200)
+        self.assertEqual(self.size_of(riff(lossy)), (300, 200))
+        lossless = b"VP8L" + struct.pack("<I", 50) + b"\x2f" + struct.pack("<I", (300 - 1) | ((200 - 1) << 14))
+        self.assertEqual(self.size_of(riff(lossless)), (300, 200))
+        extended = b"VP8X" + struct.pack("<I", 10) + b"\x00" * 4 + (300 - 1).to_bytes(3, "little") + (200 - 1).to_bytes(3, "little")
+        self.assertEqual(self.size_of(riff(extended)), (300, 200))
+
+    def test_jpeg_skips_segments_before_frame(self):
+        app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+        sof0 = b"\xff\xc0" + struct.pack(">HBHH", 17, 8, 480, 640) + b"\x00" * 10
+        self.assertEqual(self.size_of(b"\xff\xd8" + app0 + sof0), (640, 480))
+
+    def test_unknown_or_truncated(self):
+        self.assertIsNone(self.size_of(b"body { color: red }"))
+        self.assertIsNone(self.size_of(b"\xff\xd8\xff\xe0\x00"))
+
+    def test_real_image(self):
+        path = os.path.join(os.path.dirname(__file__), "..", "..", "static", "images", "tom.png")
+        if os.path.exists(path):
+            self.assertEqual(image_size(path), (928, 468))
+
+    def test_is_image_path(self):
+        self.assertTrue(is_image_path("images/a.JPG"))
+        self.assertFalse(is_image_path("index.css"))
+
+if __name__ == "__main__":
+    unittest.main()
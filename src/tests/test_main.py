@@ -0,0 +1,79 @@
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+import main
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# cumulative import time of main as reported by -X importtime, about 60ms today with headroom for slow machines
+IMPORT_TIME_BUDGET_US = 200_000
+# only imported by runs that ask for them
+LAZY_MODULES = ["sqlite3", "concurrent.futures", "multiprocessing", "gzip", "blockcache", "searchindex", "sharding", "precompress", "watcher", "pipeline"]
+
+class TestStartup(unittest.TestCase):
+
+    def import_main(self):
+        # a fresh interpreter, this one already has everything imported
+        code = "import sys, main; print(' '.join(sorted(sys.modules)))"
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=SRC_DIR, capture_output=True, text=True, check=True)
+        return result.stdout.split(), result.stderr
+
+    def test_import_time_is_within_budget(self):
+        _, report = self.import_main()
+        # import time: self [us] | cumulative | imported package
+        cumulative = {line.split("|")[2].strip(): int(line.split("|")[1]) for line in report.splitlines() if line.count("|") == 2 and not line.rstrip().endswith("imported package")}
+        self.assertLess(cumulative["main"], IMPORT_TIME_BUDGET_US)
+
+    def test_optional_subsystems_are_not_imported(self):
+        modules, _ = self.import_main()
+        self.assertIn("helperfunctions", modules)
+        for module in LAZY_MODULES:
+            self.assertNotIn(module, modules)
+
+
+class TestIncrementalMain(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        for path, text in [("template.html", "{{ Content }}"), ("static/style.css", "p {}"), ("content/index.md", "# Home"), ("content/blog/post.md", "# Post")]:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(text)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def build(self, *args):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            # the block cache stays open per process by path, a relative one would outlive this temp dir
+            main.main(["--no-block-cache", *args])
+        return [line for line in out.getvalue().splitlines() if line.startswith("Pages:")][0]
+
+    def test_one_edit_rebuilds_one_page(self):
+        self.assertIn("2 generated", self.build())
+        self.assertIn("0 generated", self.build())
+        with open("content/blog/post.md", 'w') as f:
+            f.write("# Post\n\nedited")
+        self.assertIn("1 generated (0 with identical output left untouched), 1 unchanged", self.build())
+
+
+    def test_build_without_search_removes_published_index(self):
+        self.build("--search")
+        self.assertTrue(os.path.isfile("docs/search/pages.json"))
+        self.build()
+        self.assertFalse(os.path.exists("docs/search"))
+        self.assertTrue(os.path.isfile(".build-cache/search.json"))
+        self.build("--search")
+        self.assertTrue(os.path.isfile("docs/search/pages.json"))
+
+
+if __name__ == "__main__":
+    unittest.main()
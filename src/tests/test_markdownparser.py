@@ -1,7 +1,10 @@
+import itertools
+import re
 import unittest
+from unittest import mock
 
 from nodes.textnode import TextNode,TextType
-from markdownparser import split_nodes_delimiter,extract_markdown_images,extract_markdown_links, split_nodes_image, split_nodes_links, text_to_textnodes,markdown_to_blocks,BlockType,block_to_block_type, markdown_to_html_node
+from markdownparser import split_nodes_delimiter,extract_markdown_images,extract_markdown_links, split_nodes_image, split_nodes_links, text_to_textnodes,markdown_to_blocks,BlockType,block_to_block_type, markdown_to_html_node, iter_blocks, iter_lines, StreamedMarkdown, BLOCK_RULES, block_lines_to_block_type, register_block_rule
 
 class TestMarkdownParter(unittest.TestCase):
 
@@ -352,6 +355,37 @@ class TestMarkdownParter(unittest.TestCase):
             TextNode("link", TextType.LINK, "http://link.com"),
         ], textnodes)
 
+    def test_text_to_textnodes_matches_three_pass_pipeline(self):
+        texts = [
+            "This is a **bold _text** with_ some `code block` word",
+            "This **is a **bold text** with some **`code block` word",
+            "Inside `code **not bold** [not a link](url)` and [a link](url) after",
+            "**bold [not a link](url)** then ![img](src) and [link](href)_",
+            "![a](b)![c](d)[e](f)!!![g](h)",
+            "Text with a broken ![image]( and a broken [link(too)",
+        ]
+        for text in texts:
+            expected = split_nodes_image(split_nodes_links(split_nodes_delimiter([TextNode(text, TextType.TEXT)])))
+            self.assertListEqual(expected, text_to_textnodes(text), text)
+
+    def test_text_to_textnodes_repeated_link(self):
+        textnodes = text_to_textnodes("[home](/) and again [home](/)")
+        self.assertListEqual([
+            TextNode("home", TextType.LINK, "/"),
+            TextNode(" and again ", TextType.TEXT),
+            TextNode("home", TextType.LINK, "/"),
+        ], textnodes)
+
+    def test_split_links_image_with_same_text_before_link(self):
+        node = TextNode("![a](b) [a](b)", TextType.TEXT)
+        self.assertListEqual(
+            [
+                TextNode("![a](b) ", TextType.TEXT),
+                TextNode("a", TextType.LINK, "b"),
+            ],
+            split_nodes_links([node]),
+        )
+
     def test_markdown_to_blocks(self):
         md = """
         This is **bolded** paragraph
@@ -397,6 +431,26 @@ class TestMarkdownParter(unittest.TestCase):
             "Line 3\nLine 4"
         ])
 
+    def test_iter_lines(self):
+        self.assertEqual(list(iter_lines("a\nb\n")), ["a", "b", ""])
+        self.assertEqual(list(iter_lines("")), [""])
+
+    def test_iter_blocks_classifies_and_splits_lines(self):
+        md = "# Title\n\n  - one\n- two  \n \t \n1. a\n2. b\r\n\r\nplain\ntext\n"
+        self.assertEqual(list(iter_blocks(iter_lines(md))), [
+            (BlockType.HEADING, ["# Title"]),
+            (BlockType.UNORDERED_LIST, ["- one", "- two"]),
+            (BlockType.ORDERED_LIST, ["1. a", "2. b"]),
+            (BlockType.PARAGRAPH, ["plain", "text"]),
+        ])
+
+    def test_iter_blocks_accepts_any_line_iterable(self):
+        blocks = list(iter_blocks(["> quote\n", "\n", "```\n", "code\n", "```\n"]))
+        self.assertEqual(blocks, [(BlockType.QUOTE, ["> quote"]), (BlockType.CODE, ["```", "code", "```"])])
+
+    def test_markdown_to_html_node_empty_document(self):
+        self.assertEqual(markdown_to_html_node("  \n\n").to_html(), "<div></div>")
+
     def test_block_to_block_type_heading_levels(self):
         self.assertEqual(block_to_block_type("# Heading 1"), BlockType.HEADING)
         self.assertEqual(block_to_block_type("###### Heading 6"), BlockType.HEADING)
@@ -442,6 +496,40 @@ class TestMarkdownParter(unittest.TestCase):
         block = "- Item 1\n   - Subitem"
         self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
 
+    def sequential_block_type(self, lines):
+        # the classifier before first-character dispatch, every check in turn
+        if not lines:
+            return BlockType.PARAGRAPH
+        if re.match(r"^#{1,6} ", lines[0]):
+            return BlockType.HEADING
+        if lines[0].startswith("```") and lines[-1].endswith("```"):
+            return BlockType.CODE
+        if all(line.startswith(">") for line in lines):
+            return BlockType.QUOTE
+        if all(re.match(r"^- ", line) for line in lines):
+            return BlockType.UNORDERED_LIST
+        if all(re.match(r"^\d+\. ", line) for line in lines):
+            if all(line.startswith(f"{i + 1}. ") for i, line in enumerate(lines)):
+                return BlockType.ORDERED_LIST
+        return BlockType.PARAGRAPH
+
+    def test_block_classifier_matches_sequential_checks(self):
+        lines = ["", "# h", "####### h", "#h", "```", "```py", "code```", "> q", ">q", "- a", "-a", "1. a", "2. b", "3. c", "10. a", "1.a", "١. a", "text", "`x`"]
+        for count in range(1, 4):
+            for block in itertools.product(lines, repeat=count):
+                block = list(block)
+                self.assertEqual(block_lines_to_block_type(block), self.sequential_block_type(block), block)
+        self.assertEqual(block_lines_to_block_type([]), BlockType.PARAGRAPH)
+
+    def test_registered_block_rules_are_dispatched_on_first_character(self):
+        table = object()
+        with mock.patch.dict(BLOCK_RULES):
+            register_block_rule("|", table, lambda lines: all(line.startswith("|") and line.endswith("|") for line in lines))
+            self.assertIs(block_lines_to_block_type(["| a | b |", "| 1 | 2 |"]), table)
+            self.assertEqual(block_lines_to_block_type(["| a | b", "| 1 | 2 |"]), BlockType.PARAGRAPH)
+            self.assertEqual(block_lines_to_block_type(["- a", "- b"]), BlockType.UNORDERED_LIST)
+        self.assertEqual(block_lines_to_block_type(["| a | b |"]), BlockType.PARAGRAPH)
+
     def test_paragraph_block(self):
         markdown = "This is a simple paragraph."
         node = markdown_to_html_node(markdown)
@@ -521,6 +609,20 @@ class TestMarkdownParter(unittest.TestCase):
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
         )
 
+    def test_base_path_applied_to_links_and_images_only(self):
+        md = "[home](/) **[not parsed](/x)** `href=\"/code\"` ![img](/a.png)\n\n_[styled](/y)_ [nested **bold**](/z)"
+        html = markdown_to_html_node(md, "/site/").to_html()
+        self.assertIn('<a href="/site/">home</a>', html)
+        self.assertIn('<code>href="/code"</code>', html)
+        self.assertIn('<img src="/site/a.png" alt="img"></img>', html)
+        self.assertNotIn('"/site/x"', html)
+
+    def test_streamed_markdown_matches_tree(self):
+        md = "# Title\n\nSome **bold** [link](/a)\n\n- one\n- two\n\n```\ncode\n```\n\n> quote"
+        chunks = []
+        StreamedMarkdown(iter_lines(md), "/site/").render_to(chunks)
+        self.assertEqual("".join(chunks), markdown_to_html_node(md, "/site/").to_html())
+
 # TODO : add more tests for markdown_to_html_node
 
 if __name__ == "__main__":
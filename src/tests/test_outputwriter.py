@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+from outputwriter import OutputWriter
+
+class TestOutputWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = os.path.join(self.tmp.name, "index.html")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, chunks, previous_digest=None):
+        with OutputWriter(self.dest, previous_digest, encoding="utf-8") as writer:
+            writer.writelines(chunks)
+        return writer
+
+    def test_new_file_is_written(self):
+        writer = self.write(["<p>", "hi", "</p>"])
+        self.assertTrue(writer.written)
+        with open(self.dest) as f:
+            self.assertEqual(f.read(), "<p>hi</p>")
+        self.assertEqual(os.listdir(self.tmp.name), ["index.html"])
+
+    def test_identical_output_leaves_file_untouched(self):
+        first = self.write(["<p>hi</p>"])
+        os.utime(self.dest, ns=(0, 0))
+        second = self.write(["<p>", "hi</p>"])
+        self.assertFalse(second.written)
+        self.assertEqual(second.digest, first.digest)
+        self.assertEqual(os.stat(self.dest).st_mtime_ns, 0)
+        self.assertEqual(os.listdir(self.tmp.name), ["index.html"])
+
+    def test_stored_digest_skips_reading_old_file(self):
+        first = self.write(["<p>hi</p>"])
+        # a digest that doesn't match forces a write even though the bytes are the same
+        self.assertTrue(self.write(["<p>hi</p>"], previous_digest="stale").written)
+        self.assertFalse(self.write(["<p>hi</p>"], previous_digest=first.digest).written)
+
+    def test_changed_output_replaces_file(self):
+        self.write(["<p>hi</p>"])
+        writer = self.write(["<p>bye</p>"])
+        self.assertTrue(writer.written)
+        with open(self.dest) as f:
+            self.assertEqual(f.read(), "<p>bye</p>")
+
+    def test_failed_render_keeps_old_file(self):
+        self.write(["<p>hi</p>"])
+        with self.assertRaises(RuntimeError):
+            with OutputWriter(self.dest) as writer:
+                writer.write("<p>half")
+                raise RuntimeError("render failed")
+        with open(self.dest) as f:
+            self.assertEqual(f.read(), "<p>hi</p>")
+        self.assertEqual(os.listdir(self.tmp.name), ["index.html"])
+
+
+if __name__ == "__main__":
+    unittest.main()
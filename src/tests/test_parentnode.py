@@ -1,3 +1,4 @@
+import io
 import unittest
 
 from nodes.leafnode import LeafNode
@@ -31,6 +32,30 @@ class TestParentNode(unittest.TestCase):
             parent_node.to_html(),
             "<div><span><b>grandchild</b></span></div>",
         )
+    def test_render_to_list_and_buffer(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode("Hello "), LeafNode("world", "b")]),
+            ParentNode("a", [LeafNode("link")], props={"href": "/x"}),
+        ])
+        chunks = []
+        node.render_to(chunks)
+        self.assertEqual("".join(chunks), node.to_html())
+        self.assertEqual(chunks[:3], ["<div>", "<p>", "Hello "])
+        buffer = io.StringIO()
+        node.render_to(buffer)
+        self.assertEqual(buffer.getvalue(), '<div><p>Hello <b>world</b></p><a href="/x">link</a></div>')
+
+    def test_render_to_deep_tree(self):
+        node = LeafNode("leaf")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span>" * 5000 + "leaf"))
+
+    def test_render_to_invalid_child_raises(self):
+        node = ParentNode("div", [ParentNode("p", None)])
+        with self.assertRaises(ValueError):
+            node.render_to([])
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
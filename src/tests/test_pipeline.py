@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from helperfunctions import generate_pages
+from pipeline import generate_pages_pipelined
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.jobs = []
+        for i in range(12):
+            source = os.path.join(self.tmp.name, "content", f"page{i}.md")
+            os.makedirs(os.path.dirname(source), exist_ok=True)
+            self.write(source, f"# Page {i}\n\nSome **text** for page {i}")
+            self.jobs.append(self.job(source, os.path.join(self.tmp.name, "docs", f"page{i}", "index.html")))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def job(self, source, dest):
+        return {"from_path": source, "template_path": self.template, "dest_path": dest, "base_path": "/", "collect_stats": False}
+
+    def run_quietly(self, generate, jobs, *args, **kwargs):
+        with redirect_stdout(StringIO()):
+            return generate(jobs, *args, **kwargs)
+
+    def test_matches_sequential_build(self):
+        expected = self.run_quietly(generate_pages, self.jobs)
+        pages = [self.read(job["dest_path"]) for job in self.jobs]
+        # a queue smaller than the site forces the stages to wait on each other
+        results = self.run_quietly(generate_pages_pipelined, self.jobs, io_threads=3, queue_size=2)
+        self.assertEqual([result["output_hash"] for result in results], [result["output_hash"] for result in expected])
+        self.assertEqual([self.read(job["dest_path"]) for job in self.jobs], pages)
+        self.assertIn("<title>Page 3</title><div><h1>Page 3</h1><p>Some <b>text</b> for page 3</p></div>", pages[3])
+
+    def test_unchanged_output_is_not_rewritten(self):
+        first = self.run_quietly(generate_pages_pipelined, self.jobs)
+        jobs = [dict(job, previous_output_hash=result["output_hash"]) for job, result in zip(self.jobs, first)]
+        second = self.run_quietly(generate_pages_pipelined, jobs)
+        self.assertTrue(all(result["written"] for result in first))
+        self.assertFalse(any(result["written"] for result in second))
+
+    def test_process_workers(self):
+        results = self.run_quietly(generate_pages_pipelined, self.jobs, 2, queue_size=2)
+        self.assertEqual(len(results), len(self.jobs))
+        self.assertIn("<h1>Page 11</h1>", self.read(self.jobs[11]["dest_path"]))
+
+    def test_large_sources_are_streamed(self):
+        self.run_quietly(generate_pages, self.jobs)
+        pages = [self.read(job["dest_path"]) for job in self.jobs]
+        jobs = [dict(job, stream_threshold=1) for job in self.jobs[:6]] + self.jobs[6:]
+        results = self.run_quietly(generate_pages_pipelined, jobs, queue_size=2)
+        self.assertTrue(all(result is not None for result in results))
+        self.assertEqual([self.read(job["dest_path"]) for job in self.jobs], pages)
+
+    def test_missing_source_raises(self):
+        # a failure early on must not leave the other stages blocked on full queues
+        jobs = self.jobs[:1] + [self.job(os.path.join(self.tmp.name, "missing.md"), os.path.join(self.tmp.name, "docs", "missing.html"))] + self.jobs[1:]
+        with self.assertRaises(FileNotFoundError):
+            self.run_quietly(generate_pages_pipelined, jobs, queue_size=2)
+
+if __name__ == "__main__":
+    unittest.main()
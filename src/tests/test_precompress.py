@@ -0,0 +1,62 @@
+import gzip
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+import precompress
+from precompress import precompress_dir
+
+class TestPrecompress(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.out = self.tmp.name
+        os.makedirs(os.path.join(self.out, "blog"))
+        self.page = os.path.join(self.out, "blog", "index.html")
+        self.write(self.page, "<p>hello</p>" * 200)
+        self.write(os.path.join(self.out, "small.css"), "body {}")
+        self.write(os.path.join(self.out, "image.png"), "x" * 5000)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def run_quietly(self, previous=None):
+        with redirect_stdout(io.StringIO()):
+            return precompress_dir(self.out, previous, workers=2)
+
+    def test_only_large_text_files_get_siblings(self):
+        record = self.run_quietly()
+        self.assertEqual(list(record), [os.path.join("blog", "index.html")])
+        with gzip.open(self.page + ".gz", 'rt') as f:
+            self.assertEqual(f.read(), "<p>hello</p>" * 200)
+        self.assertFalse(os.path.exists(os.path.join(self.out, "small.css.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.out, "image.png.gz")))
+
+    def test_unchanged_files_are_skipped(self):
+        record = self.run_quietly()
+        with mock.patch.object(precompress, "_compress_file") as compress_file:
+            self.run_quietly(record)
+            # touched but identical content is recognised by its digest
+            os.utime(self.page, ns=(0, 0))
+            record = self.run_quietly(record)
+        compress_file.assert_not_called()
+        self.write(self.page, "<p>changed</p>" * 200)
+        with mock.patch.object(precompress, "_compress_file") as compress_file:
+            self.run_quietly(record)
+        compress_file.assert_called_once_with(self.page)
+
+    def test_siblings_of_removed_files_are_removed(self):
+        record = self.run_quietly()
+        os.remove(self.page)
+        self.assertEqual(self.run_quietly(record), {})
+        self.assertFalse(os.path.exists(os.path.join(self.out, "blog")))
+
+if __name__ == "__main__":
+    unittest.main()
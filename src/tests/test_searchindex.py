@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+import unittest
+
+from searchindex import SearchIndex, page_postings, page_url
+
+class TestPagePostings(unittest.TestCase):
+
+    def test_positions_count_every_word(self):
+        postings = page_postings(["The Hobbit", "a hobbit's tale"])
+        self.assertEqual(postings["hobbit"], [1, 3])
+        self.assertEqual(postings["tale"], [5])
+        # single characters are counted but not indexed
+        self.assertNotIn("a", postings)
+        self.assertNotIn("s", postings)
+
+    def test_list_markup_is_not_indexed(self):
+        self.assertEqual(page_postings(["<li>one</li><li>two</li>"]), {"one": [0], "two": [1]})
+
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.out = os.path.join(self.tmp.name, "search")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, name):
+        with open(os.path.join(self.out, name)) as f:
+            return json.load(f)
+
+    def test_write_shards_by_prefix(self):
+        index = SearchIndex()
+        index.record("content/b.md", os.path.join("blog", "index.html"), "Blog", page_postings(["tolkien wrote"]))
+        index.record("content/a.md", "index.html", "Home", page_postings(["tolkien tolkien"]))
+        self.assertEqual(index.write(self.out, "/site/"), 2)
+        pages = self.read("pages.json")
+        self.assertEqual(pages["pages"], [{"url": "/site/", "title": "Home"}, {"url": "/site/blog", "title": "Blog"}])
+        self.assertEqual(self.read("to.json"), {"tolkien": [[0, 0, 1], [1, 0]]})
+        self.assertEqual(self.read("wr.json"), {"wrote": [[1, 1]]})
+
+    def test_stale_shards_are_removed(self):
+        index = SearchIndex()
+        index.record("a.md", "index.html", "Home", page_postings(["first"]))
+        index.write(self.out)
+        index.record("a.md", "index.html", "Home", page_postings(["second"]))
+        index.pop_missing({"a.md"})
+        index.write(self.out)
+        self.assertEqual(sorted(os.listdir(self.out)), ["pages.json", "se.json"])
+
+    def test_save_and_load_round_trip(self):
+        path = os.path.join(self.tmp.name, "cache", "search.json")
+        index = SearchIndex()
+        index.record("a.md", "index.html", "Home", {"home": [0]})
+        index.save(path)
+        self.assertEqual(SearchIndex.load(path).pages, index.pages)
+        self.assertEqual(SearchIndex.load(os.path.join(self.tmp.name, "missing.json")).pages, {})
+
+    def test_page_url(self):
+        self.assertEqual(page_url("index.html"), "/")
+        self.assertEqual(page_url(os.path.join("blog", "tom", "index.html"), "/site/"), "/site/blog/tom")
+        self.assertEqual(page_url("about.html"), "/about.html")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from buildmanifest import BuildManifest
+from helperfunctions import generate_page_recursive
+from sharding import SHARD_MANIFEST_NAME, merge_shards, parse_shard, shard_of, write_shard_manifest
+
+class TestSharding(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        for i in range(8):
+            self.write(os.path.join(self.content, f"page{i}", "index.md"), f"# Page {i}\n\n[home](/)")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def build(self, dest, shard=None):
+        manifest = BuildManifest()
+        with redirect_stdout(io.StringIO()):
+            generate_page_recursive(self.content, self.template, dest, "/site/", manifest, shard=shard)
+        if shard is not None:
+            write_shard_manifest(dest, shard, "/site/", manifest, self.content)
+        return manifest
+
+    def build_shards(self, count):
+        dirs = [os.path.join(self.tmp.name, f"shard{i}") for i in range(count)]
+        for i, shard_dir in enumerate(dirs):
+            self.build(shard_dir, (i, count))
+        return dirs
+
+    def read_tree(self, root):
+        tree = {}
+        for dir_path, _, file_names in os.walk(root):
+            for file_name in file_names:
+                with open(os.path.join(dir_path, file_name)) as f:
+                    tree[os.path.relpath(os.path.join(dir_path, file_name), root)] = f.read()
+        return tree
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("1/3"), (1, 3))
+        for text in ("3/3", "-1/3", "1", "a/b", "0/0"):
+            with self.assertRaises(ValueError):
+                parse_shard(text)
+
+    def test_shard_of_is_stable(self):
+        self.assertEqual(shard_of("blog/tom/index.md", 4), shard_of("blog/tom/index.md", 4))
+        self.assertEqual({shard_of(f"page{i}/index.md", 1) for i in range(8)}, {0})
+
+    def test_merged_shards_match_single_build(self):
+        single = os.path.join(self.tmp.name, "single")
+        self.build(single)
+        dirs = self.build_shards(3)
+        self.assertEqual(sum(len(self.read_tree(shard_dir)) - 1 for shard_dir in dirs), 8)
+        merged = os.path.join(self.tmp.name, "merged")
+        with redirect_stdout(io.StringIO()):
+            result = merge_shards(dirs, self.content, merged)
+        self.assertEqual(result["pages"], 8)
+        self.assertEqual(self.read_tree(merged), self.read_tree(single))
+
+    def test_missing_and_duplicate_pages_are_reported(self):
+        dirs = self.build_shards(2)
+        with self.assertRaises(ValueError) as missing:
+            merge_shards(dirs[:1], self.content, os.path.join(self.tmp.name, "merged"))
+        self.assertIn("not built by any shard", str(missing.exception))
+        with self.assertRaises(ValueError) as duplicate:
+            merge_shards([dirs[0], dirs[1], dirs[1]], self.content, os.path.join(self.tmp.name, "merged"))
+        self.assertIn("built by more than one shard", str(duplicate.exception))
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "merged")))
+
+    def test_tampered_output_is_reported(self):
+        dirs = self.build_shards(1)
+        self.write(os.path.join(dirs[0], "page0", "index.html"), "changed")
+        with self.assertRaises(ValueError) as tampered:
+            merge_shards(dirs, self.content, os.path.join(self.tmp.name, "merged"))
+        self.assertIn("doesn't match", str(tampered.exception))
+        self.assertTrue(os.path.exists(os.path.join(dirs[0], SHARD_MANIFEST_NAME)))
+
+if __name__ == "__main__":
+    unittest.main()
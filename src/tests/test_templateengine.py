@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+
+from assetmap import AssetMap
+from nodes.leafnode import LeafNode
+from nodes.parentnode import ParentNode
+from templateengine import TemplateCache, compile_template, resolve_layout
+
+class TestTemplateEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(os.path.join(self.tmp.name, "partials"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def test_compile_splits_literals_and_slots(self):
+        self.write(self.template, "<title>{{ Title }}</title><article>{{ Content }}</article>")
+        template = compile_template(self.template)
+        self.assertEqual(template.literals, ["<title>", "</title><article>", "</article>"])
+        self.assertEqual([name for name, _ in template.slots], ["Title", "Content"])
+
+    def test_render(self):
+        self.write(self.template, "<title>{{ Title }}</title><article>{{ Content }}</article>")
+        html = compile_template(self.template).render({"Title": "Hi", "Content": "<p>{{ Title }}</p>"})
+        self.assertEqual(html, "<title>Hi</title><article><p>{{ Title }}</p></article>")
+
+    def test_render_to_streams_nodes(self):
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}{{ Unknown }}")
+        chunks = []
+        compile_template(self.template).render_to(chunks, {"Title": "Hi", "Content": ParentNode("p", [LeafNode("body")])})
+        self.assertEqual("".join(chunks), "<title>Hi</title><p>body</p>{{ Unknown }}")
+
+    def test_compile_applies_base_path_to_markup(self):
+        self.write(self.template, """<link href="/index.css"><script src='/a.js'></script><a href="//cdn/x">{{ Content }}""")
+        template = compile_template(self.template, "/site/")
+        html = template.render({"Content": '<a href="/raw">'})
+        self.assertEqual(html, """<link href="/site/index.css"><script src='/site/a.js'></script><a href="//cdn/x"><a href="/raw">""")
+
+    def test_compile_points_static_references_at_fingerprinted_copies(self):
+        self.write(self.template, """<link href="/index.css"><img src="/a.png?x=1"><a href="/{{ Page }}">{{ Content }}""")
+        assets = AssetMap({"/index.css": "/index.0123.css", "/a.png": "/a.4567.png"})
+        template = compile_template(self.template, "/site/", assets)
+        self.assertEqual(template.urls, ["/", "/a.png?x=1", "/index.css"])
+        self.assertEqual(template.render({"Page": "p", "Content": ""}), """<link href="/site/index.0123.css"><img src="/site/a.4567.png?x=1"><a href="/site/p">""")
+        cache = TemplateCache()
+        self.assertIsNot(cache.get(self.template, "/", assets), cache.get(self.template, "/"))
+
+    def test_cache_is_per_base_path(self):
+        self.write(self.template, '<link href="/index.css">')
+        cache = TemplateCache()
+        self.assertIsNot(cache.get(self.template, "/a/"), cache.get(self.template, "/b/"))
+        self.assertEqual(cache.get(self.template, "/a/").render({}), '<link href="/a/index.css">')
+
+    def test_render_leaves_unknown_placeholders(self):
+        self.write(self.template, "{{ Title }} {{ Unknown }}")
+        self.assertEqual(compile_template(self.template).render({"Title": "Hi"}), "Hi {{ Unknown }}")
+
+    def test_partials_are_inlined(self):
+        self.write(os.path.join(self.tmp.name, "partials", "head.html"), "<title>{{ Title }}</title>")
+        self.write(self.template, "<head>{{> head }}</head>{{ Content }}")
+        template = compile_template(self.template)
+        self.assertEqual(template.render({"Title": "T", "Content": "C"}), "<head><title>T</title></head>C")
+        self.assertEqual(template.dependencies, [self.template, os.path.join(self.tmp.name, "partials", "head.html")])
+
+    def test_recursive_partial_raises(self):
+        self.write(os.path.join(self.tmp.name, "partials", "loop.html"), "{{> loop }}")
+        self.write(self.template, "{{> loop }}")
+        with self.assertRaises(ValueError):
+            compile_template(self.template)
+
+    def test_missing_template_raises(self):
+        with self.assertRaises(FileNotFoundError):
+            compile_template(os.path.join(self.tmp.name, "missing.html"))
+
+    def test_cache_reuses_and_invalidates(self):
+        partial = os.path.join(self.tmp.name, "partials", "foot.html")
+        self.write(partial, "old")
+        self.write(self.template, "{{ Content }}{{> foot }}")
+        cache = TemplateCache()
+        first = cache.get(self.template)
+        self.assertIs(cache.get(self.template), first)
+        os.utime(partial, ns=(1, 1))
+        self.assertIs(cache.get(self.template), first)
+        self.write(partial, "new!")
+        second = cache.get(self.template)
+        self.assertIsNot(second, first)
+        self.assertNotEqual(second.hash, first.hash)
+        self.assertEqual(second.render({"Content": ""}), "new!")
+
+    def test_resolve_layout(self):
+        self.assertEqual(resolve_layout("./template.html"), "./template.html")
+        self.assertEqual(resolve_layout("./template.html", "post"), os.path.join(".", "layouts", "post.html"))
+
+
+if __name__ == "__main__":
+    unittest.main()
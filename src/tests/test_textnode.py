@@ -1,6 +1,7 @@
 import unittest
 
-from nodes.textnode import TextNode, TextType, text_node_to_html_node
+from assetmap import AssetMap
+from nodes.textnode import TextNode, TextType, apply_base_path, text_node_to_html_node
 
 class TestTextNode(unittest.TestCase):
     def test_eq(self):
@@ -28,6 +29,12 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode("This is a text node", TextType.LINK)
         self.assertNotEqual(node, node2)
 
+    def test_no_instance_dict(self):
+        node = TextNode("This is a text node", TextType.BOLD)
+        self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            node.extra = 1
+
     def test_text_to_html_text_type_text(self):
         node = TextNode("This is a text node", TextType.TEXT)
         html_node = text_node_to_html_node(node)
@@ -73,6 +80,34 @@ class TestTextNode(unittest.TestCase):
         self.assertEqual(html_node.tag, "img")
         self.assertEqual(html_node.value, "")
         self.assertEqual(html_node.props, {"src": node.url, "alt": node.text})
+    def test_apply_base_path(self):
+        self.assertEqual(apply_base_path("/images/a.png", "/site/"), "/site/images/a.png")
+        self.assertEqual(apply_base_path("/", "/site/"), "/site/")
+        self.assertEqual(apply_base_path("/images/a.png", "/"), "/images/a.png")
+        self.assertEqual(apply_base_path("https://example.com/", "/site/"), "https://example.com/")
+        self.assertEqual(apply_base_path("//cdn.example.com/a.js", "/site/"), "//cdn.example.com/a.js")
+        self.assertEqual(apply_base_path("relative.png", "/site/"), "relative.png")
+
+    def test_apply_base_path_with_assets(self):
+        assets = AssetMap({"/images/a.png": "/images/a.0123.png"})
+        self.assertEqual(apply_base_path("/images/a.png", "/site/", assets), "/site/images/a.0123.png")
+        self.assertEqual(apply_base_path("/images/a.png#x", "/", assets), "/images/a.0123.png#x")
+        self.assertEqual(apply_base_path("images/a.png", "/", assets), "images/a.png")
+
+    def test_image_attributes_from_assets(self):
+        assets = AssetMap(images={"/images/a.png": (640, 480)})
+        image = text_node_to_html_node(TextNode("alt", TextType.IMAGE, "/images/a.png"), "/site/", assets)
+        self.assertEqual(image.props, {"src": "/site/images/a.png", "alt": "alt", "width": "640", "height": "480", "loading": "lazy", "decoding": "async"})
+        image = text_node_to_html_node(TextNode("alt", TextType.IMAGE, "https://example.com/b.png"), "/", assets)
+        self.assertEqual(image.props, {"src": "https://example.com/b.png", "alt": "alt", "loading": "lazy", "decoding": "async"})
+        image = text_node_to_html_node(TextNode("alt", TextType.IMAGE, "/images/a.png"), "/", AssetMap())
+        self.assertEqual(image.props, {"src": "/images/a.png", "alt": "alt"})
+
+    def test_text_to_html_base_path(self):
+        link = text_node_to_html_node(TextNode("home", TextType.LINK, "/"), "/site/")
+        self.assertEqual(link.props, {"href": "/site/"})
+        image = text_node_to_html_node(TextNode("alt", TextType.IMAGE, "/images/a.png"), "/site/")
+        self.assertEqual(image.props, {"src": "/site/images/a.png", "alt": "alt"})
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
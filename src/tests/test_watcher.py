@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+
+from watcher import changed_paths, snapshot, wait_for_quiet
+
+class TestWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.post = os.path.join(self.content, "blog", "post.md")
+        self.write(self.template, "{{ Content }}")
+        self.write(self.post, "# Post")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def test_snapshot_covers_files_and_directories(self):
+        self.assertEqual(sorted(snapshot([self.content, self.template])), sorted([self.post, self.template]))
+
+    def test_changed_paths(self):
+        before = snapshot([self.content, self.template])
+        self.write(self.post, "# Post, edited")
+        new_page = os.path.join(self.content, "new.md")
+        self.write(new_page, "# New")
+        os.remove(self.template)
+        after = snapshot([self.content, self.template])
+        self.assertEqual(changed_paths(before, after), {self.post, new_page, self.template})
+        self.assertEqual(changed_paths(after, after), set())
+
+    def test_wait_for_quiet_returns_once_nothing_changes(self):
+        current = snapshot([self.content])
+        changed, latest = wait_for_quiet([self.content], current, 0.01)
+        self.assertEqual(changed, set())
+        self.assertEqual(latest, current)
+
+
+if __name__ == "__main__":
+    unittest.main()
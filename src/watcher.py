@@ -0,0 +1,81 @@
+import os
+import time
+
+
+def snapshot(paths):
+    # path -> (mtime_ns, size) for every file under the given files and directories
+    state = {}
+    for path in paths:
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            state[path] = (stat.st_mtime_ns, stat.st_size)
+            continue
+        for root, _, file_names in os.walk(path):
+            for file_name in file_names:
+                file_path = os.path.join(root, file_name)
+                try:
+                    stat = os.stat(file_path)
+                except FileNotFoundError:
+                    continue
+                state[file_path] = (stat.st_mtime_ns, stat.st_size)
+    return state
+
+
+def changed_paths(previous, current):
+    changed = {path for path, signature in current.items() if previous.get(path) != signature}
+    changed.update(path for path in previous if path not in current)
+    return changed
+
+
+def wait_for_quiet(paths, current, debounce):
+    # editors often save in bursts (temp file, rename, chmod), so keep polling until nothing moved for `debounce` seconds
+    changed = set()
+    while True:
+        time.sleep(debounce)
+        latest = snapshot(paths)
+        more = changed_paths(current, latest)
+        if not more:
+            return changed, current
+        changed |= more
+        current = latest
+
+
+def _newest_mtime_ns(paths):
+    newest = 0
+    for path in paths:
+        try:
+            newest = max(newest, os.stat(path).st_mtime_ns)
+        except FileNotFoundError:
+            continue
+    return newest
+
+
+def watch(paths, rebuild, interval=0.5, debounce=0.2):
+    print(f"Watching {', '.join(paths)} for changes (Ctrl+C to stop)")
+    previous = snapshot(paths)
+    try:
+        while True:
+            time.sleep(interval)
+            current = snapshot(paths)
+            changed = changed_paths(previous, current)
+            if not changed:
+                continue
+            more, current = wait_for_quiet(paths, current, debounce)
+            changed |= more
+            for path in sorted(changed):
+                print(f"Changed: {path}")
+
+            started = time.perf_counter()
+            try:
+                rebuild(changed)
+            except Exception as e:
+                # a broken page shouldn't end the session, the next save gets another try
+                print(f"Rebuild failed: {e}")
+            else:
+                build_time = time.perf_counter() - started
+                saved_at = _newest_mtime_ns(changed)
+                latency = (time.time_ns() - saved_at) / 1e9 if saved_at else build_time
+                print(f"Rebuilt in {build_time:.3f}s, output written {latency:.3f}s after save")
+            previous = current
+    except KeyboardInterrupt:
+        print("Stopped watching")